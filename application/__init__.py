@@ -1,3 +1,4 @@
+import threading
 from logging.config import dictConfig
 
 from fastapi import FastAPI
@@ -62,4 +63,23 @@ def create_app() -> FastAPI:
     for router in routers:
         app.include_router(router.router)
 
+    from .service import provider_service, provider_status_service
+
+    app.add_event_handler("shutdown", provider_status_service.close_status_client)
+    app.add_event_handler("shutdown", provider_service.close_status_client)
+
+    from .config.mongodb import ensure_indexes
+    from .utils.logger import log
+
+    def ensure_indexes_in_background():
+        try:
+            ensure_indexes()
+        except Exception as e:
+            log.warning(f"Could not ensure MongoDB indexes: {str(e)}")
+
+    # Index creation waits for server selection, so it must not hold up startup
+    threading.Thread(
+        target=ensure_indexes_in_background, name="ensure-indexes", daemon=True
+    ).start()
+
     return app
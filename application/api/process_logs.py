@@ -15,13 +15,9 @@ async def stream_task_logs(task_id: str, wallet_address: str = Depends(verify_to
 
     async def event_generator():
         try:
-            async for log in log_service.get_redis_logs(task_id, wallet_address):
-                print(f"log: {log}")
-                if log:
-                    yield f"data: {log}\n\n"
-                else:
-                    # Send heartbeat every time there's no new log
-                    yield f":\n\n"
+            # Log service yields ready-made event frames, or a heartbeat when idle
+            async for chunk in log_service.get_redis_logs(task_id, wallet_address):
+                yield chunk
         except Exception as e:
             raise HTTPException(
                 status_code=404, detail=f"Error streaming logs: {str(e)}"
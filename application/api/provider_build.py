@@ -12,7 +12,7 @@ from application.model.provider_build_input import ProviderBuildInput
 from application.model.machine_input import ControlMachineInput
 from application.service.akash_cluster_service import AkashClusterService
 from application.service.provider_service import ProviderService
-from application.utils.ssh_utils import get_ssh_client
+from application.utils.ssh_utils import get_ssh_client, ssh_pool
 from application.service.wallet_service import WalletService
 from application.utils.logger import log
 from application.utils.dependency import verify_token
@@ -210,10 +210,13 @@ async def get_provider_pricing(
             )
 
         control_machine_input = ControlMachineInput(**control_machine)
-        ssh_client = get_ssh_client(control_machine_input)
+        ssh_client = ssh_pool.acquire(control_machine_input)
 
         provider_service = ProviderService()
-        pricing = await provider_service.get_provider_pricing(ssh_client)
+        try:
+            pricing = await provider_service.get_provider_pricing(ssh_client)
+        finally:
+            ssh_pool.release(ssh_client)
 
         return {
             "message": "Provider pricing retrieved successfully",
@@ -491,10 +494,13 @@ async def restart_provider(
             )
 
         control_machine_input = ControlMachineInput(**control_machine)
-        ssh_client = get_ssh_client(control_machine_input)
+        ssh_client = ssh_pool.acquire(control_machine_input)
 
         provider_service = ProviderService()
-        await provider_service.restart_provider_service(ssh_client)
+        try:
+            await provider_service.restart_provider_service(ssh_client)
+        finally:
+            ssh_pool.release(ssh_client)
 
         return {"message": "Provider restart process started successfully"}
     except Exception as e:
@@ -130,7 +130,7 @@ async def get_provider_earnings(
     Get provider earnings for a specific wallet address and date range.
     """
     try:
-        earnings_data = provider_earnings_service.get_provider_earnings(
+        earnings_data = await provider_earnings_service.get_provider_earnings(
             wallet_address=wallet_address, from_date=from_date, to_date=to_date
         )
         return earnings_data
@@ -42,6 +42,7 @@ class Config:
     )
     NVIDIA_DEVICE_PLUGIN_VERSION = environ.get("NVIDIA_DEVICE_PLUGIN_VERSION", "0.14.5")
     ROOK_CEPH_VERSION = environ.get("ROOK_CEPH_VERSION", "1.15.3")
+    CALICO_VERSION = environ.get("CALICO_VERSION", "v3.30.3")
 
     # Authentication
     HOST_NAME = environ.get("HOST_NAME")
@@ -52,6 +53,18 @@ class Config:
     REDIS_URI = environ.get("REDIS_URI")
     REDIS_PORT = environ.get("REDIS_PORT")
     REDIS_PASSWORD = environ.get("REDIS_PASSWORD")
+    LOG_STREAM_MAXLEN = int(environ.get("LOG_STREAM_MAXLEN", 10000))
+    LOG_STREAM_TTL = int(environ.get("LOG_STREAM_TTL", 86400))
+    REDIS_MAX_CONNECTIONS = int(environ.get("REDIS_MAX_CONNECTIONS", 64))
 
     # Misc
+    SSH_MAX_PARALLEL_COMMANDS = int(environ.get("SSH_MAX_PARALLEL_COMMANDS", 8))
     HELM_VERSION = environ.get("HELM_VERSION", "v3.11.0")
+    HELM_BINARY_MIRROR_URL = environ.get(
+        "HELM_BINARY_MIRROR_URL", "https://get.helm.sh"
+    )
+    YQ_VERSION = environ.get("YQ_VERSION", "v4.44.3")
+    YQ_SHA256 = environ.get("YQ_SHA256")
+    DOWNLOAD_CACHE_DIR = environ.get(
+        "DOWNLOAD_CACHE_DIR", "/var/cache/provider-console-api"
+    )
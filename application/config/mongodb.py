@@ -12,3 +12,9 @@ actions_collection = provider_console_db["actions"]
 wallet_addresses_collection = provider_console_db["wallet_addresses"]
 logs_collection = provider_console_db["logs"]
 api_keys_collection = provider_console_db["api_keys"]
+
+
+def ensure_indexes():
+    """Create the indexes that hot queries rely on; a no-op if they exist."""
+    # Every log write and read looks documents up by task_id
+    logs_collection.create_index([("task_id", 1)], background=True)
@@ -66,3 +66,14 @@ def update_action_status(action_id: str, status: str) -> None:
     except Exception as e:
         log.error(f"Error updating action status: {str(e)}")
         raise
+
+
+def update_action(action_id: str, update_data: Dict[str, Any]) -> None:
+    """
+    Set several fields of an action in a single update.
+    """
+    try:
+        actions_collection.update_one({"_id": action_id}, {"$set": update_data})
+    except Exception as e:
+        log.error(f"Error updating action: {str(e)}")
+        raise
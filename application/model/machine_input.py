@@ -1,6 +1,7 @@
 from pydantic import BaseModel, field_validator, model_validator
 from typing import Optional
 from fastapi import UploadFile
+from paramiko import PKey
 import socket
 import re
 import ipaddress
@@ -13,19 +14,22 @@ class ControlMachineInput(BaseModel):
     password: Optional[str] = None
     keyfile: Optional[UploadFile] = None
     passphrase: Optional[str] = None
+    # Already parsed private key, used as is without a temporary keyfile
+    pkey: Optional[PKey] = None
 
     @model_validator(mode="before")
     @classmethod
     def validate_auth_method(cls, values):
         password = values.get("password")
         keyfile = values.get("keyfile")
-        if password and keyfile:
+        pkey = values.get("pkey")
+        if sum(bool(method) for method in (password, keyfile, pkey)) > 1:
             raise ValueError(
-                "Authentication conflict: Both password and keyfile provided. Please use only one method."
+                "Authentication conflict: More than one of password, keyfile and pkey provided. Please use only one method."
             )
-        if not password and not keyfile:
+        if not password and not keyfile and not pkey:
             raise ValueError(
-                "Authentication required: Either password or keyfile must be provided."
+                "Authentication required: Either password, keyfile or pkey must be provided."
             )
         return values
 
@@ -73,19 +77,22 @@ class WorkerNodeInput(BaseModel):
     password: Optional[str] = None
     keyfile: Optional[UploadFile] = None
     passphrase: Optional[str] = None
+    # Already parsed private key, used as is without a temporary keyfile
+    pkey: Optional[PKey] = None
 
     @model_validator(mode="before")
     @classmethod
     def validate_auth_method(cls, values):
         password = values.get("password")
         keyfile = values.get("keyfile")
-        if password and keyfile:
+        pkey = values.get("pkey")
+        if sum(bool(method) for method in (password, keyfile, pkey)) > 1:
             raise ValueError(
-                "Authentication conflict: Both password and keyfile provided. Please use only one method."
+                "Authentication conflict: More than one of password, keyfile and pkey provided. Please use only one method."
             )
-        if not password and not keyfile:
+        if not password and not keyfile and not pkey:
             raise ValueError(
-                "Authentication required: Either password or keyfile must be provided."
+                "Authentication required: Either password, keyfile or pkey must be provided."
             )
         return values
 
@@ -1,6 +1,6 @@
 import asyncio
 from enum import Enum
-from typing import Callable, Any
+from typing import Callable, Any, List, Optional
 
 from application.utils.logger import log
 
@@ -20,6 +20,7 @@ class Task:
         description: str,
         func: Callable,
         *args: Any,
+        depends_on: Optional[List[str]] = None,
         **kwargs: Any,
     ):
         self.task_id = task_id
@@ -28,6 +29,8 @@ class Task:
         self.func = func
         self.args = args + (task_id,)
         self.kwargs = kwargs
+        # Names of earlier tasks this one waits for; None means all of them
+        self.depends_on = depends_on
         self.status = TaskStatus.NOT_STARTED
         self.error_message = None
 
@@ -8,7 +8,7 @@ from application.model.provider_build_input import ProviderBuildInput
 from application.service.task_manager import TaskManager, Task
 from application.utils.logger import log
 from application.data.wallet_addresses import store_wallet_action_mapping
-from application.utils.ssh_utils import get_ssh_client
+from application.utils.ssh_utils import get_ssh_client, ssh_pool
 from application.config.config import Config
 
 
@@ -29,17 +29,24 @@ class AkashClusterService:
         log.info(f"Starting Akash cluster creation for action {action_id}")
 
         try:
-            k3s_tasks = self._create_k3s_tasks(provider_build_input.nodes)
-            provider_tasks = self._create_provider_tasks(
-                provider_build_input, wallet_address
-            )
-            self.task_manager.create_action(
-                action_id,
-                "Build Cluster",
-                k3s_tasks + provider_tasks,
-            )
-            store_wallet_action_mapping(wallet_address, action_id)
-            await self.task_manager.run_action(action_id)
+            # One connection to the main node carries every k3s and provider step
+            ssh_client = get_ssh_client(provider_build_input.nodes[0])
+            try:
+                k3s_tasks = self._create_k3s_tasks(
+                    provider_build_input.nodes, ssh_client
+                )
+                provider_tasks = self._create_provider_tasks(
+                    provider_build_input, wallet_address, ssh_client
+                )
+                self.task_manager.create_action(
+                    action_id,
+                    "Build Cluster",
+                    k3s_tasks + provider_tasks,
+                )
+                store_wallet_action_mapping(wallet_address, action_id)
+                await self.task_manager.run_action(action_id)
+            finally:
+                ssh_client.close()
             log.info(f"Akash cluster creation completed for action {action_id}")
         except Exception as e:
             log.error(
@@ -47,8 +54,7 @@ class AkashClusterService:
             )
             raise
 
-    def _create_k3s_tasks(self, nodes):
-        ssh_client = get_ssh_client(nodes[0])
+    def _create_k3s_tasks(self, nodes, ssh_client):
         control_nodes = []
         worker_nodes = []
 
@@ -162,22 +168,24 @@ class AkashClusterService:
                 )
             )
 
-        # GPU driver installation for all nodes
-        for i, node in enumerate(nodes):
-            if node.install_gpu_drivers:
-                node_type = "main_node" if i == 0 else "worker_node"
-                k3s_tasks.append(
-                    Task(
-                        str(uuid4()),
-                        f"install_gpu_drivers_{node.hostname}",
-                        f"Install GPU drivers and toolkit on {node.hostname}",
-                        self.k3s_service._install_gpu_drivers_and_toolkit,
-                        ssh_client,
-                        node,
-                        node_type,
-                        gpu_name,
-                    )
+        # GPU driver installation for all nodes, run concurrently across nodes
+        gpu_nodes = [
+            (node, "main_node" if i == 0 else "worker_node")
+            for i, node in enumerate(nodes)
+            if node.install_gpu_drivers
+        ]
+        if gpu_nodes:
+            k3s_tasks.append(
+                Task(
+                    str(uuid4()),
+                    "install_gpu_drivers",
+                    f"Install GPU drivers and toolkit on {', '.join(node.hostname for node, _ in gpu_nodes)}",
+                    self.k3s_service.bulk_install_gpu,
+                    ssh_client,
+                    gpu_nodes,
+                    gpu_name,
                 )
+            )
 
         for i, node in reversed(list(enumerate(nodes))):
             if node.install_gpu_drivers:
@@ -197,7 +205,7 @@ class AkashClusterService:
         return k3s_tasks
 
     def _create_provider_tasks(
-        self, provider_build_input: ProviderBuildInput, wallet_address: str
+        self, provider_build_input: ProviderBuildInput, wallet_address: str, ssh_client
     ):
         chain_id = Config.CHAIN_ID
         provider_version = Config.PROVIDER_SERVICES_VERSION.replace("v", "")
@@ -209,8 +217,6 @@ class AkashClusterService:
         pricing = provider_build_input.provider.pricing
         email = provider_build_input.provider.config.email
 
-        ssh_client = get_ssh_client(provider_build_input.nodes[0])
-
         # Initialize an empty list to store nodes that require GPU driver installation
         install_gpu_driver_nodes = []
 
@@ -220,6 +226,9 @@ class AkashClusterService:
                 node_name = f"node{index + 1}"
                 install_gpu_driver_nodes.append(node_name)
 
+        # Independent steps share a dependency level and run concurrently; the
+        # SFTP uploads of install_helm and prepare_provider_config stay apart
+        # because they share the connection's single SFTP session
         provider_tasks = [
             Task(
                 str(uuid4()),
@@ -227,23 +236,25 @@ class AkashClusterService:
                 "Install Helm",
                 self.provider_service._install_helm,
                 ssh_client,
+                depends_on=[],
             ),
             Task(
                 str(uuid4()),
-                "setup_helm_repos",
-                "Set up Helm repositories",
-                self.provider_service._setup_helm_repos,
+                "install_akash_crds",
+                "Install Akash CRDs",
+                self.provider_service._install_akash_crds,
                 ssh_client,
+                provider_version,
+                depends_on=[],
             ),
             Task(
                 str(uuid4()),
-                "install_akash_services",
-                "Install Akash services",
-                self.provider_service._install_akash_services,
+                "setup_helm_repos",
+                "Set up Helm repositories",
+                self.provider_service._setup_helm_repos,
                 ssh_client,
-                chain_id,
-                provider_version,
-                node_version,
+                bool(install_gpu_driver_nodes),
+                depends_on=["install_helm"],
             ),
             Task(
                 str(uuid4()),
@@ -259,29 +270,35 @@ class AkashClusterService:
                 organization,
                 pricing,
                 email,
+                depends_on=["install_helm"],
             ),
             Task(
                 str(uuid4()),
-                "install_akash_crds",
-                "Install Akash CRDs",
-                self.provider_service._install_akash_crds,
+                "install_akash_services",
+                "Install Akash services",
+                self.provider_service._install_akash_services,
                 ssh_client,
+                chain_id,
                 provider_version,
+                node_version,
+                depends_on=["setup_helm_repos", "install_akash_crds"],
             ),
             Task(
                 str(uuid4()),
-                "install_akash_provider_service",
-                "Install Akash provider service",
-                self.provider_service._install_akash_provider,
+                "install_nginx_ingress",
+                "Install NGINX Ingress",
+                self.provider_service._install_nginx_ingress,
                 ssh_client,
-                provider_version,
+                depends_on=["setup_helm_repos"],
             ),
             Task(
                 str(uuid4()),
-                "install_nginx_ingress",
-                "Install NGINX Ingress",
-                self.provider_service._install_nginx_ingress,
+                "install_akash_provider_service",
+                "Install Akash provider service",
+                self.provider_service._install_akash_provider,
                 ssh_client,
+                provider_version,
+                depends_on=["install_akash_services", "prepare_provider_config"],
             ),
         ]
 
@@ -314,68 +331,84 @@ class AkashClusterService:
     async def update_provider_attributes(
         self, action_id, control_machine, attributes, wallet_address
     ):
-        ssh_client = get_ssh_client(control_machine)
-        task = Task(
-            str(uuid4()),
-            "update_provider_attributes",
-            "Update provider attributes",
-            self.provider_service.update_provider_attributes,
-            ssh_client,
-            attributes,
-        )
-        self.task_manager.create_action(action_id, "Update Provider Attributes", [task])
-        store_wallet_action_mapping(wallet_address, action_id)
-        await self.task_manager.run_action(action_id)
+        ssh_client = ssh_pool.acquire(control_machine)
+        try:
+            task = Task(
+                str(uuid4()),
+                "update_provider_attributes",
+                "Update provider attributes",
+                self.provider_service.update_provider_attributes,
+                ssh_client,
+                attributes,
+            )
+            self.task_manager.create_action(
+                action_id, "Update Provider Attributes", [task]
+            )
+            store_wallet_action_mapping(wallet_address, action_id)
+            await self.task_manager.run_action(action_id)
+        finally:
+            ssh_pool.release(ssh_client)
         log.info(f"Provider attributes update completed for action {action_id}")
 
     async def update_provider_pricing(
         self, action_id, control_machine, pricing, wallet_address
     ):
-        ssh_client = get_ssh_client(control_machine)
-        task = Task(
-            str(uuid4()),
-            "update_provider_pricing",
-            "Update provider pricing",
-            self.provider_service.update_provider_pricing,
-            ssh_client,
-            pricing,
-        )
-        self.task_manager.create_action(action_id, "Update Provider Pricing", [task])
-        store_wallet_action_mapping(wallet_address, action_id)
-        await self.task_manager.run_action(action_id)
+        ssh_client = ssh_pool.acquire(control_machine)
+        try:
+            task = Task(
+                str(uuid4()),
+                "update_provider_pricing",
+                "Update provider pricing",
+                self.provider_service.update_provider_pricing,
+                ssh_client,
+                pricing,
+            )
+            self.task_manager.create_action(
+                action_id, "Update Provider Pricing", [task]
+            )
+            store_wallet_action_mapping(wallet_address, action_id)
+            await self.task_manager.run_action(action_id)
+        finally:
+            ssh_pool.release(ssh_client)
 
     async def update_provider_domain(
         self, action_id, control_machine, domain, wallet_address
     ):
-        ssh_client = get_ssh_client(control_machine)
-        task = Task(
-            str(uuid4()),
-            "update_provider_domain",
-            "Update provider domain",
-            self.provider_service.update_provider_domain,
-            ssh_client,
-            domain,
-        )
-        self.task_manager.create_action(action_id, "Update Provider Domain", [task])
-        store_wallet_action_mapping(wallet_address, action_id)
-        await self.task_manager.run_action(action_id)
+        ssh_client = ssh_pool.acquire(control_machine)
+        try:
+            task = Task(
+                str(uuid4()),
+                "update_provider_domain",
+                "Update provider domain",
+                self.provider_service.update_provider_domain,
+                ssh_client,
+                domain,
+            )
+            self.task_manager.create_action(action_id, "Update Provider Domain", [task])
+            store_wallet_action_mapping(wallet_address, action_id)
+            await self.task_manager.run_action(action_id)
+        finally:
+            ssh_pool.release(ssh_client)
         log.info(f"Provider domain update completed for action {action_id}")
 
     async def update_provider_email(
         self, action_id, control_machine, email, wallet_address
     ):
-        ssh_client = get_ssh_client(control_machine)
-        task = Task(
-            str(uuid4()),
-            "update_provider_email",
-            "Update provider email",
-            self.provider_service.update_provider_email,
-            ssh_client,
-            email,
-        )
-        self.task_manager.create_action(action_id, "Update Provider Email", [task])
-        store_wallet_action_mapping(wallet_address, action_id)
-        await self.task_manager.run_action(action_id)
+        ssh_client = ssh_pool.acquire(control_machine)
+        try:
+            task = Task(
+                str(uuid4()),
+                "update_provider_email",
+                "Update provider email",
+                self.provider_service.update_provider_email,
+                ssh_client,
+                email,
+            )
+            self.task_manager.create_action(action_id, "Update Provider Email", [task])
+            store_wallet_action_mapping(wallet_address, action_id)
+            await self.task_manager.run_action(action_id)
+        finally:
+            ssh_pool.release(ssh_client)
         log.info(f"Provider email update completed for action {action_id}")
 
     async def upgrade_network(self, action_id, control_machine, wallet_address):
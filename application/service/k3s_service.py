@@ -1,31 +1,193 @@
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import status
-import json
+import orjson
 import io
-
+import os
+import random
+import re
+import shlex
+import socket
+import threading
+from pathlib import Path
+from string import Template
+from weakref import WeakKeyDictionary
+
+import yaml
 from fastapi import UploadFile
 
+from application.config.config import Config
 from application.exception.application_error import ApplicationError
 from application.model.machine_input import ControlMachineInput, WorkerNodeInput
+from application.utils.download_cache import get_cached_file
 from application.utils.logger import log
 from application.utils.ssh_utils import (
     get_ssh_client,
     run_ssh_command,
+    run_ssh_command_stream,
     connect_to_worker_node,
+    ssh_pool,
+)
+
+
+# Reboot wait settings, in seconds
+REBOOT_TIMEOUT = 300
+REBOOT_PROBE_TIMEOUT = 2
+REBOOT_MAX_BACKOFF = 30
+BOOT_ID_CMD = "cat /proc/sys/kernel/random/boot_id"
+
+SCHEDULER_CONFIG_PATH = "/var/lib/rancher/k3s/server/etc/scheduler-config.yaml"
+SCHEDULER_CONFIG_YAML = b"""apiVersion: kubescheduler.config.k8s.io/v1
+kind: KubeSchedulerConfiguration
+clientConnection:
+  kubeconfig: "/var/lib/rancher/k3s/server/cred/scheduler.kubeconfig"
+leaderElection:
+  leaderElect: true
+profiles:
+- schedulerName: default-scheduler
+  plugins:
+    score:
+      enabled:
+      - name: NodeResourcesFit
+  pluginConfig:
+  - name: NodeResourcesFit
+    args:
+      scoringStrategy:
+        type: MostAllocated
+        resources:
+        - name: nvidia.com/gpu
+          weight: 10
+        - name: memory
+          weight: 1
+        - name: cpu
+          weight: 1
+        - name: ephemeral-storage
+          weight: 1
+"""
+
+NAMESPACES_MANIFEST = """apiVersion: v1
+kind: Namespace
+metadata:
+  name: akash-services
+  labels:
+    akash.network/name: akash-services
+    akash.network: "true"
+---
+apiVersion: v1
+kind: Namespace
+metadata:
+  name: lease
+  labels:
+    akash.network: "true"
+"""
+
+PRIVATE_IP_PATTERN = re.compile(
+    r"^(10\.|172\.(1[6-9]|2[0-9]|3[0-1])\.|192\.168\.|100\.(6[4-9]|[7-9][0-9]|1[01][0-9]|12[0-7])\.)"
 )
 
+NODE_ROLE_LABEL_PREFIX = "node-role.kubernetes.io/"
+
+YQ_RELEASE_URL = "https://github.com/mikefarah/yq/releases/download"
+
+# Concurrent cluster builds share the cached Calico manifest and its temp file
+_calico_manifest_lock = threading.Lock()
+
+
+def _published_yq_sha256(version: str) -> str:
+    """Return the SHA-256 of yq_linux_amd64 as published with the yq release."""
+    # The release lists each asset's hashes in a column order given by a sidecar file
+    hash_order = get_cached_file(
+        f"{YQ_RELEASE_URL}/{version}/checksums_hashes_order",
+        f"yq_checksums_hashes_order_{version}",
+    )
+    checksums = get_cached_file(
+        f"{YQ_RELEASE_URL}/{version}/checksums", f"yq_checksums_{version}"
+    )
+    hash_names = hash_order.read_text().split()
+    for line in checksums.read_text().splitlines():
+        fields = line.split()
+        if fields and fields[0] == "yq_linux_amd64" and "SHA-256" in hash_names:
+            return fields[hash_names.index("SHA-256") + 1]
+    raise ValueError(
+        f"No published SHA-256 found for yq {version}; set YQ_SHA256 explicitly"
+    )
+
+
+def _node_address(node: dict, address_type: str) -> str:
+    addresses = node["status"].get("addresses") or []
+    return next((a["address"] for a in addresses if a["type"] == address_type), "N/A")
+
+
+def _node_ready_status(node: dict) -> str:
+    conditions = node["status"].get("conditions") or []
+    return next((c["status"] for c in conditions if c["type"] == "Ready"), "Unknown")
+
+
+def _shape_nodes(raw: dict) -> dict:
+    """Project `kubectl get nodes -o json` output to the fields the API returns."""
+    return {
+        "nodes": [
+            {
+                "name": node["metadata"]["name"],
+                "status": _node_ready_status(node),
+                "roles": ",".join(
+                    key[len(NODE_ROLE_LABEL_PREFIX) :]
+                    for key in node["metadata"].get("labels", {})
+                    if key.startswith(NODE_ROLE_LABEL_PREFIX)
+                ),
+                "age": node["metadata"]["creationTimestamp"],
+                "version": node["status"]["nodeInfo"]["kubeletVersion"],
+                "internalIP": _node_address(node, "InternalIP"),
+                "externalIP": _node_address(node, "ExternalIP"),
+                "osImage": node["status"]["nodeInfo"]["osImage"],
+                "kernelVersion": node["status"]["nodeInfo"]["kernelVersion"],
+                "containerRuntime": node["status"]["nodeInfo"][
+                    "containerRuntimeVersion"
+                ],
+            }
+            for node in raw["items"]
+        ]
+    }
+
 
 class K3sService:
 
-    INTERNAL_IP_CMD = r"""ip -4 -o a | while read -r line; do set -- $line; if echo "$4" | grep -qE '^(10\.|172\.(1[6-9]|2[0-9]|3[0-1])\.|192\.168\.|100\.(6[4-9]|[7-9][0-9]|1[01][0-9]|12[0-7])\.)'; then echo "${4%/*}"; break; fi; done"""
+    INTERNAL_IP_CMD = "ip -4 -j a"
     SSH_KEY_CMD = "cat ~/.ssh/id_ed25519"
+    # Substituted values must already be shell-quoted
+    K3S_INSTALL_TMPL = Template(
+        "curl -sfL https://get.k3s.io | INSTALL_K3S_EXEC=$exec sh -"
+    )
+    K3S_JOIN_TMPL = Template(
+        "curl -sfL https://get.k3s.io | INSTALL_K3S_EXEC=$exec K3S_URL=$url K3S_TOKEN=$token sh -"
+    )
+
+    def __init__(self):
+        # Internal IPs keyed by the SSH transport they were resolved on, so
+        # entries disappear together with the connection.
+        self._internal_ip_cache = WeakKeyDictionary()
+        self._ubuntu_version_cache = {}
+        # Hosts whose apt package lists need refreshing, keyed by host
+        self._apt_dirty = defaultdict(lambda: True)
+        # Control node's key for worker access, read once per service instance
+        self._worker_keyfile_content = None
+        self._worker_key_lock = threading.Lock()
 
     def check_existing_installations(self, control_input: ControlMachineInput):
         log.info(f"Checking for existing installations on {control_input.hostname}")
         try:
             with get_ssh_client(control_input) as ssh_client:
-                self._check_kubectl(ssh_client, control_input.hostname)
-                self._check_kubelet(ssh_client, control_input.hostname)
+                # Both probes are independent, run them on separate channels
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    kubectl_future = executor.submit(
+                        self._check_kubectl, ssh_client, control_input.hostname
+                    )
+                    kubelet_future = executor.submit(
+                        self._check_kubelet, ssh_client, control_input.hostname
+                    )
+                    kubectl_future.result()
+                    kubelet_future.result()
                 log.info(
                     f"No existing Kubernetes installations found on {control_input.hostname}"
                 )
@@ -68,6 +230,25 @@ class K3sService:
         )
         return bool(stdout.strip())
 
+    def _get_internal_ip(self, ssh_client) -> str:
+        transport = ssh_client.transport
+        if transport in self._internal_ip_cache:
+            return self._internal_ip_cache[transport]
+
+        # Not logged to the task: the output is the node's full interface list
+        stdout, _ = run_ssh_command(ssh_client, self.INTERNAL_IP_CMD)
+        internal_ip = next(
+            (
+                addr_info["local"]
+                for interface in orjson.loads(stdout)
+                for addr_info in interface.get("addr_info", [])
+                if PRIVATE_IP_PATTERN.match(addr_info.get("local", ""))
+            ),
+            "",
+        )
+        self._internal_ip_cache[transport] = internal_ip
+        return internal_ip
+
     def _initialize_k3s_control(
         self, ssh_client, control_input: ControlMachineInput, task_id: str
     ):
@@ -77,68 +258,47 @@ class K3sService:
         try:
             external_ip = control_input.hostname
             disable_components = "traefik"
-            install_exec = f"--disable={disable_components} --flannel-backend=none --disable-network-policy --cluster-init"
+            install_args = [
+                f"--disable={disable_components}",
+                "--flannel-backend=none",
+                "--disable-network-policy",
+                "--cluster-init",
+            ]
 
-            internal_ip, _ = run_ssh_command(
-                ssh_client, self.INTERNAL_IP_CMD, task_id=task_id
-            )
-            internal_ip = internal_ip.strip()
+            internal_ip = self._get_internal_ip(ssh_client)
 
-            install_exec += f" --node-ip={internal_ip} --advertise-address={internal_ip} --kube-scheduler-arg=config=/var/lib/rancher/k3s/server/etc/scheduler-config.yaml"
+            install_args.extend(
+                [
+                    f"--node-ip={internal_ip}",
+                    f"--advertise-address={internal_ip}",
+                    f"--kube-scheduler-arg=config={SCHEDULER_CONFIG_PATH}",
+                ]
+            )
             log.info(f"Setting node IP to {internal_ip}")
 
             if external_ip:
-                install_exec += f" --node-external-ip={external_ip}"
+                install_args.append(f"--node-external-ip={external_ip}")
                 log.info(f"Setting external IP to {external_ip}")
 
-            install_exec += f" --tls-san={internal_ip}"
+            install_args.append(f"--tls-san={internal_ip}")
             if external_ip:
-                install_exec += f" --tls-san={external_ip}"
+                install_args.append(f"--tls-san={external_ip}")
             log.info(
                 f"Adding IPs to TLS SAN: {internal_ip}{', ' + external_ip if external_ip else ''}"
             )
+            install_args.append("--node-name node1")
+            install_exec = " ".join(install_args)
 
             time.sleep(5)
 
-            install_command = f"curl -sfL https://get.k3s.io | INSTALL_K3S_EXEC='{install_exec} --node-name node1' sh -"
-
-            scheduler_config = """
-cat > /var/lib/rancher/k3s/server/etc/scheduler-config.yaml << EOF
-apiVersion: kubescheduler.config.k8s.io/v1
-kind: KubeSchedulerConfiguration
-clientConnection:
-  kubeconfig: "/var/lib/rancher/k3s/server/cred/scheduler.kubeconfig"
-leaderElection:
-  leaderElect: true
-profiles:
-- schedulerName: default-scheduler
-  plugins:
-    score:
-      enabled:
-      - name: NodeResourcesFit
-  pluginConfig:
-  - name: NodeResourcesFit
-    args:
-      scoringStrategy:
-        type: MostAllocated
-        resources:
-        - name: nvidia.com/gpu
-          weight: 10
-        - name: memory
-          weight: 1
-        - name: cpu
-          weight: 1
-        - name: ephemeral-storage
-          weight: 1
-EOF
-"""
-            run_ssh_command(
-                ssh_client, "mkdir -p /var/lib/rancher/k3s/server/etc", task_id=task_id
+            install_command = self.K3S_INSTALL_TMPL.substitute(
+                exec=shlex.quote(install_exec)
             )
-            run_ssh_command(ssh_client, scheduler_config, task_id=task_id)
+
+            self._upload_scheduler_config(ssh_client, task_id)
 
             log.info(f"Executing K3s initialization command: {install_command}")
-            run_ssh_command(ssh_client, install_command, task_id=task_id)
+            run_ssh_command_stream(ssh_client, install_command, task_id=task_id)
 
             log.info(
                 f"K3s initialization completed, waiting for it to be ready on {control_input.hostname}"
@@ -155,32 +315,40 @@ EOF
         except Exception as e:
             self._handle_unexpected_error(e, "K3s initialization")
 
+    def _upload_scheduler_config(self, ssh_client, task_id: str):
+        run_ssh_command(
+            ssh_client, "mkdir -p /var/lib/rancher/k3s/server/etc", task_id=task_id
+        )
+        ssh_client.put(io.BytesIO(SCHEDULER_CONFIG_YAML), remote=SCHEDULER_CONFIG_PATH)
+        ssh_client.sftp().chmod(SCHEDULER_CONFIG_PATH, 0o644)
+
     def _wait_for_k3s_ready(
         self,
         ssh_client,
         timeout: int = 300,
-        check_interval: int = 10,
+        max_check_interval: int = 8,
         task_id: str = None,
     ):
         log.info(
-            f"Waiting for K3s to be ready (timeout: {timeout}s, check interval: {check_interval}s)"
+            f"Waiting for K3s to be ready (timeout: {timeout}s, max check interval: {max_check_interval}s)"
         )
         start_time = time.time()
-        time.sleep(5)
+        check_interval = 0.5
         while time.time() - start_time < timeout:
             stdout, _ = run_ssh_command(
                 ssh_client,
-                "kubectl get nodes",
+                """kubectl get nodes -o jsonpath='{.items[*].status.conditions[?(@.type=="Ready")].status}'""",
                 check_exit_status=False,
                 task_id=task_id,
             )
-            if "Ready" in stdout:
+            if "True" in stdout.split():
                 log.info("K3s is ready")
                 return
             log.debug(
                 f"K3s not ready yet, waiting {check_interval} seconds before next check"
             )
             time.sleep(check_interval)
+            check_interval = min(max_check_interval, check_interval * 2)
 
         log.error(f"K3s did not become ready within {timeout} seconds")
         raise ApplicationError(
@@ -195,8 +363,8 @@ EOF
     def _update_and_install_dependencies(self, ssh_client, task_id: str):
         try:
             log.info("Updating system and installing dependencies")
-            run_ssh_command(ssh_client, "apt-get update", task_id=task_id)
-            run_ssh_command(
+            self._apt_update(ssh_client, task_id)
+            run_ssh_command_stream(
                 ssh_client,
                 "DEBIAN_FRONTEND=noninteractive apt-get upgrade -qy",
                 task_id=task_id,
@@ -204,17 +372,20 @@ EOF
             time.sleep(5)
             run_ssh_command(
                 ssh_client,
-                "DEBIAN_FRONTEND=noninteractive apt-get install git wget unzip curl alsa-utils jq lvm2 -qy",
+                "DEBIAN_FRONTEND=noninteractive apt-get install --no-install-recommends -qy git wget unzip curl alsa-utils jq lvm2",
                 task_id=task_id,
             )
             log.info("System update and dependency installation completed successfully")
 
             log.info("Installing yq...")
-            run_ssh_command(
-                ssh_client,
-                "curl -L https://github.com/mikefarah/yq/releases/latest/download/yq_linux_amd64 -o /usr/bin/yq && chmod +x /usr/bin/yq",
-                task_id=task_id,
+            # The binary is installed as root on every node, so never push it unverified
+            yq_path = get_cached_file(
+                f"{YQ_RELEASE_URL}/{Config.YQ_VERSION}/yq_linux_amd64",
+                f"yq_linux_amd64_{Config.YQ_VERSION}",
+                sha256=Config.YQ_SHA256 or _published_yq_sha256(Config.YQ_VERSION),
             )
+            ssh_client.put(str(yq_path), remote="/usr/bin/yq")
+            ssh_client.sftp().chmod("/usr/bin/yq", 0o755)
             log.info("yq installation completed successfully")
         except Exception as e:
             log.error(
@@ -232,101 +403,91 @@ EOF
     def _install_calico_cni(self, ssh_client, task_id: str):
         try:
             log.info("Installing Calico CNI...")
-            commands = [
-                "curl -O https://raw.githubusercontent.com/projectcalico/calico/v3.30.3/manifests/calico.yaml",
-                'yq eval -i \'(select(.kind=="DaemonSet" and .metadata.name=="calico-node").spec.template.spec.containers[] | select(.name=="calico-node").env[] | select(.name=="CALICO_IPV4POOL_VXLAN").value) = "Always"\' calico.yaml',
-                'yq eval -i \'(select(.kind=="DaemonSet" and .metadata.name=="calico-node").spec.template.spec.containers[] | select(.name=="calico-node").env[] | select(.name=="CALICO_IPV4POOL_IPIP").value) = "Never"\' calico.yaml',
-                'yq eval-all \'(select(.kind == "DaemonSet" and .metadata.name == "calico-node").spec.template.spec.containers[] | select(.name == "calico-node").env) += [{"name":"IP_AUTODETECTION_METHOD","value":"kubernetes-internal-ip"}, {"name":"FELIX_WIREGUARDENABLED","value":"false"}]\' -i calico.yaml',
-                'yq eval -i \'(select(.kind=="DaemonSet" and .metadata.name=="calico-node").spec.template.spec.containers[] | select(.name=="calico-node").readinessProbe.exec.command) = ["/bin/calico-node","-felix-ready"]\' calico.yaml',
-                "kubectl apply -f calico.yaml",
-            ]
+            manifest_path = self._get_patched_calico_manifest()
             time.sleep(5)
-            for command in commands:
-                run_ssh_command(ssh_client, command, task_id=task_id)
+            ssh_client.put(str(manifest_path), remote="calico.yaml")
+            run_ssh_command(ssh_client, "kubectl apply -f calico.yaml", task_id=task_id)
             log.info("Calico CNI installation completed successfully")
         except Exception as e:
             self._handle_unexpected_error(e, "Calico CNI installation")
 
+    def _get_patched_calico_manifest(self) -> Path:
+        """Return the Calico manifest with the Akash-specific edits applied, cached locally."""
+        version = Config.CALICO_VERSION
+        patched_path = (
+            Path(Config.DOWNLOAD_CACHE_DIR) / f"calico-{version}.patched.yaml"
+        )
+        with _calico_manifest_lock:
+            if not patched_path.exists():
+                self._write_patched_calico_manifest(version, patched_path)
+        return patched_path
+
+    def _write_patched_calico_manifest(self, version: str, patched_path: Path):
+        manifest_path = get_cached_file(
+            f"https://raw.githubusercontent.com/projectcalico/calico/{version}/manifests/calico.yaml",
+            f"calico-{version}.yaml",
+        )
+        documents = list(yaml.safe_load_all(manifest_path.read_text()))
+        for document in documents:
+            if not (
+                document
+                and document.get("kind") == "DaemonSet"
+                and document["metadata"]["name"] == "calico-node"
+            ):
+                continue
+            for container in document["spec"]["template"]["spec"]["containers"]:
+                if container["name"] != "calico-node":
+                    continue
+                for env in container["env"]:
+                    if env["name"] == "CALICO_IPV4POOL_VXLAN":
+                        env["value"] = "Always"
+                    elif env["name"] == "CALICO_IPV4POOL_IPIP":
+                        env["value"] = "Never"
+                container["env"].extend(
+                    [
+                        {
+                            "name": "IP_AUTODETECTION_METHOD",
+                            "value": "kubernetes-internal-ip",
+                        },
+                        {"name": "FELIX_WIREGUARDENABLED", "value": "false"},
+                    ]
+                )
+                container.setdefault("readinessProbe", {}).setdefault("exec", {})[
+                    "command"
+                ] = ["/bin/calico-node", "-felix-ready"]
+
+        temp_path = patched_path.with_name(f"{patched_path.name}.tmp")
+        temp_path.write_text(yaml.safe_dump_all(documents, sort_keys=False))
+        os.replace(temp_path, patched_path)
+
     def _update_kubeconfig(self, ssh_client, external_ip: str, task_id: str):
         try:
             log.info(f"Updating kubeconfig file to use internal IP address...")
 
             kubeconfig_path = "/etc/rancher/k3s/k3s.yaml"
 
-            internal_ip, _ = run_ssh_command(
-                ssh_client, self.INTERNAL_IP_CMD, task_id=task_id
-            )
-            internal_ip = internal_ip.strip()
+            internal_ip = self._get_internal_ip(ssh_client)
 
             time.sleep(5)
-            ca_data, _ = run_ssh_command(
-                ssh_client,
-                "kubectl config view --raw -o jsonpath='{.clusters[0].cluster.certificate-authority-data}'",
-                task_id=task_id,
+            # Read the generated kubeconfig once and rewrite it locally; the
+            # output holds client credentials, so it is not streamed to task logs
+            kubeconfig_content, _ = run_ssh_command(
+                ssh_client, f"sudo cat {kubeconfig_path}"
             )
-            ca_data = ca_data.strip()
+            kubeconfig = yaml.safe_load(kubeconfig_content)
+            kubeconfig["clusters"][0]["cluster"][
+                "server"
+            ] = f"https://{internal_ip}:6443"
+            new_kubeconfig = yaml.safe_dump(kubeconfig, sort_keys=False).encode()
 
-            client_cert_data, _ = run_ssh_command(
-                ssh_client,
-                "kubectl config view --raw -o jsonpath='{.users[0].user.client-certificate-data}'",
-                task_id=task_id,
-            )
-            client_cert_data = client_cert_data.strip()
-
-            client_key_data, _ = run_ssh_command(
-                ssh_client,
-                "kubectl config view --raw -o jsonpath='{.users[0].user.client-key-data}'",
-                task_id=task_id,
-            )
-            client_key_data = client_key_data.strip()
-
-            new_kubeconfig = f"""apiVersion: v1
-clusters:
-- cluster:
-    certificate-authority-data: {ca_data}
-    server: https://{internal_ip}:6443
-  name: k3s-cluster
-contexts:
-- context:
-    cluster: k3s-cluster
-    user: default
-  name: default
-current-context: default
-kind: Config
-preferences: {{}}
-users:
-- name: default
-  user:
-    client-certificate-data: {client_cert_data}
-    client-key-data: {client_key_data}
-"""
-
-            command = (
-                f"sudo tee {kubeconfig_path} > /dev/null << EOL\n{new_kubeconfig}\nEOL"
-            )
-            run_ssh_command(ssh_client, command, task_id=task_id)
+            ssh_client.put(io.BytesIO(new_kubeconfig), remote=kubeconfig_path)
 
             # Create .kube directory if it doesn't exist
             run_ssh_command(ssh_client, "mkdir -p ~/.kube", task_id=task_id)
 
-            # Remove existing config file if it exists
-            run_ssh_command(ssh_client, "rm -f ~/.kube/config", task_id=task_id)
-
-            time.sleep(5)
-            # Copy k3s.yaml to ~/.kube/config
-            run_ssh_command(
-                ssh_client, f"sudo cp {kubeconfig_path} ~/.kube/config", task_id=task_id
-            )
-
-            run_ssh_command(ssh_client, "chmod 600 ~/.kube/config", task_id=task_id)
-
-            # Set correct permissions for the config file
-            run_ssh_command(
-                ssh_client,
-                "sudo chown $(id -u):$(id -g) ~/.kube/config",
-                task_id=task_id,
-            )
-            run_ssh_command(ssh_client, "chmod 644 ~/.kube/config", task_id=task_id)
+            # SFTP paths are relative to the home directory of the SSH user
+            ssh_client.put(io.BytesIO(new_kubeconfig), remote=".kube/config")
+            ssh_client.sftp().chmod(".kube/config", 0o644)
 
             log.info("Copied k3s.yaml to ~/.kube/config with correct permissions.")
 
@@ -342,6 +503,19 @@ users:
                 },
             )
 
+    def _get_join_credentials(self, control_ssh_client, task_id: str):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            token_future = executor.submit(
+                run_ssh_command,
+                control_ssh_client,
+                "sudo cat /var/lib/rancher/k3s/server/node-token",
+                task_id=task_id,
+            )
+            ip_future = executor.submit(self._get_internal_ip, control_ssh_client)
+            token, _ = token_future.result()
+            master_ip = ip_future.result()
+        return token, master_ip
+
     def _join_control_node(
         self,
         control_ssh_client,
@@ -351,74 +525,39 @@ users:
     ):
         log.info(f"Starting K3s installation on control node {node_input.hostname}")
         try:
-            # Get K3s token from the main control node
-            token, _ = run_ssh_command(
-                control_ssh_client,
-                "sudo cat /var/lib/rancher/k3s/server/node-token",
-                task_id=task_id,
-            )
-
-            # Get the main control node's IP address
-            master_ip, _ = run_ssh_command(
-                control_ssh_client, self.INTERNAL_IP_CMD, task_id=task_id
-            )
+            # Get K3s token and IP address from the main control node
+            token, master_ip = self._get_join_credentials(control_ssh_client, task_id)
 
             # Connect to the worker node through the control node
             worker_ssh_client = connect_to_worker_node(control_ssh_client, node_input)
             try:
                 # Get the internal IP of the new control node
-                internal_ip, _ = run_ssh_command(
-                    worker_ssh_client, self.INTERNAL_IP_CMD, task_id=task_id
-                )
-                internal_ip = internal_ip.strip()
+                internal_ip = self._get_internal_ip(worker_ssh_client)
 
                 # Set up the installation command
-                install_exec = f"--disable=traefik --flannel-backend=none --disable-network-policy --node-ip={internal_ip} --node-name {node_name} --kube-scheduler-arg=config=/var/lib/rancher/k3s/server/etc/scheduler-config.yaml"
+                install_args = [
+                    "--disable=traefik",
+                    "--flannel-backend=none",
+                    "--disable-network-policy",
+                    f"--node-ip={internal_ip}",
+                    f"--node-name {node_name}",
+                    f"--kube-scheduler-arg=config={SCHEDULER_CONFIG_PATH}",
+                ]
 
                 if node_input.hostname:
-                    install_exec += f" --tls-san={node_input.hostname}"
-
-                install_command = f"""curl -sfL https://get.k3s.io | INSTALL_K3S_EXEC="server {install_exec}" K3S_URL="https://{master_ip}:6443" K3S_TOKEN="{token}" sh -"""
+                    install_args.append(f"--tls-san={node_input.hostname}")
+                install_exec = " ".join(install_args)
 
-                scheduler_config = """
-cat > /var/lib/rancher/k3s/server/etc/scheduler-config.yaml << EOF
-apiVersion: kubescheduler.config.k8s.io/v1
-kind: KubeSchedulerConfiguration
-clientConnection:
-  kubeconfig: "/var/lib/rancher/k3s/server/cred/scheduler.kubeconfig"
-leaderElection:
-  leaderElect: true
-profiles:
-- schedulerName: default-scheduler
-  plugins:
-    score:
-      enabled:
-      - name: NodeResourcesFit
-  pluginConfig:
-  - name: NodeResourcesFit
-    args:
-      scoringStrategy:
-        type: MostAllocated
-        resources:
-        - name: nvidia.com/gpu
-          weight: 10
-        - name: memory
-          weight: 1
-        - name: cpu
-          weight: 1
-        - name: ephemeral-storage
-          weight: 1
-EOF
-"""
-                run_ssh_command(
-                    worker_ssh_client,
-                    "mkdir -p /var/lib/rancher/k3s/server/etc",
-                    task_id=task_id,
+                install_command = self.K3S_JOIN_TMPL.substitute(
+                    exec=shlex.quote(f"server {install_exec}"),
+                    url=shlex.quote(f"https://{master_ip}:6443"),
+                    token=shlex.quote(token),
                 )
-                run_ssh_command(worker_ssh_client, scheduler_config, task_id=task_id)
+
+                self._upload_scheduler_config(worker_ssh_client, task_id)
 
                 # Execute the installation command
-                stdout, stderr = run_ssh_command(
+                run_ssh_command_stream(
                     worker_ssh_client, install_command, task_id=task_id
                 )
 
@@ -427,8 +566,6 @@ EOF
                 )
                 return {
                     "message": "Control-plane node added to the cluster successfully",
-                    "stdout": stdout,
-                    "stderr": stderr,
                 }
             finally:
                 worker_ssh_client.close()
@@ -446,24 +583,19 @@ EOF
     ):
         log.info(f"Starting K3s installation on worker node {node_input.hostname}")
         try:
-            # Get K3s token from the main control node
-            token, _ = run_ssh_command(
-                control_ssh_client,
-                "sudo cat /var/lib/rancher/k3s/server/node-token",
-                task_id=task_id,
-            )
-
-            # Get the main control node's IP address
-            master_ip, _ = run_ssh_command(
-                control_ssh_client, self.INTERNAL_IP_CMD, task_id=task_id
-            )
+            # Get K3s token and IP address from the main control node
+            token, master_ip = self._get_join_credentials(control_ssh_client, task_id)
 
             # Connect to the worker node through the control node
             worker_ssh_client = connect_to_worker_node(control_ssh_client, node_input)
             try:
                 # Install K3s on the worker node
-                install_command = f"curl -sfL https://get.k3s.io | INSTALL_K3S_EXEC='--node-name {node_name}' K3S_URL=https://{master_ip}:6443 K3S_TOKEN={token} sh -"
-                stdout, stderr = run_ssh_command(
+                install_command = self.K3S_JOIN_TMPL.substitute(
+                    exec=shlex.quote(f"--node-name {node_name}"),
+                    url=shlex.quote(f"https://{master_ip}:6443"),
+                    token=shlex.quote(token),
+                )
+                run_ssh_command_stream(
                     worker_ssh_client, install_command, task_id=task_id
                 )
 
@@ -472,8 +604,6 @@ EOF
                 )
                 return {
                     "message": "K3s installation completed successfully",
-                    "stdout": stdout,
-                    "stderr": stderr,
                 }
             finally:
                 worker_ssh_client.close()
@@ -516,7 +646,7 @@ EOF
                 return {"message": "Worker node removed from the cluster successfully"}
 
             finally:
-                worker_ssh_client.close()
+                ssh_pool.release(worker_ssh_client)
         except ApplicationError:
             raise
         except Exception as e:
@@ -560,25 +690,58 @@ EOF
         except Exception as e:
             self._handle_unexpected_error(e, "GPU installation")
 
+    def bulk_install_gpu(self, ssh_client, nodes: list, gpu_name: str, task_id: str):
+        """Install GPU drivers and toolkit on several nodes concurrently.
+
+        ``nodes`` is a list of ``(node_input, node_type)`` tuples.
+        """
+        log.info(f"Starting GPU driver installation on {len(nodes)} nodes")
+        with ThreadPoolExecutor(max_workers=min(16, len(nodes))) as executor:
+            futures = [
+                executor.submit(
+                    self._install_gpu_drivers_and_toolkit,
+                    ssh_client,
+                    node,
+                    node_type,
+                    gpu_name,
+                    task_id,
+                )
+                for node, node_type in nodes
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+        return {
+            "message": f"GPU drivers and toolkit installation completed successfully on {len(nodes)} nodes"
+        }
+
     def _update_system(
         self, ssh_client, control_input: ControlMachineInput, task_id: str
     ):
         log.info(f"Updating system on {control_input.hostname}")
         time.sleep(5)
-        run_ssh_command(ssh_client, "apt update", task_id=task_id)
-        run_ssh_command(
+        self._apt_update(ssh_client, task_id)
+        run_ssh_command_stream(
             ssh_client,
             'DEBIAN_FRONTEND=noninteractive apt-get -y -o Dpkg::Options::="--force-confdef" -o Dpkg::Options::="--force-confold" dist-upgrade',
             task_id=task_id,
         )
         run_ssh_command(ssh_client, "apt-get autoremove -y", task_id=task_id)
 
+    def _apt_update(self, ssh_client, task_id: str):
+        """Refresh apt package lists unless already done since the last sources change."""
+        if self._apt_dirty[ssh_client.host]:
+            run_ssh_command(ssh_client, "apt-get update", task_id=task_id)
+            self._apt_dirty[ssh_client.host] = False
+
     def _get_ubuntu_version(self, ssh_client, task_id: str) -> str:
         """Get Ubuntu version from the system"""
-        stdout, _ = run_ssh_command(
-            ssh_client, "lsb_release -rs | grep -oE '[0-9]+\.[0-9]+'", task_id=task_id
-        )
-        return stdout.strip()
+        if ssh_client.host not in self._ubuntu_version_cache:
+            stdout, _ = run_ssh_command(
+                ssh_client, '. /etc/os-release && echo "$VERSION_ID"', task_id=task_id
+            )
+            self._ubuntu_version_cache[ssh_client.host] = stdout.strip()
+        return self._ubuntu_version_cache[ssh_client.host]
 
     def _install_nvidia_drivers(
         self,
@@ -594,31 +757,43 @@ EOF
         ubuntu_version = self._get_ubuntu_version(ssh_client, task_id)
         ubuntu_codename = f"ubuntu{ubuntu_version.replace('.','')}"
 
-        # Install NVIDIA drivers
-        nvidia_570_commands = [
-            f"wget https://developer.download.nvidia.com/compute/cuda/repos/{ubuntu_codename}/x86_64/3bf863cc.pub",
-            "apt-key add 3bf863cc.pub",
-            f"echo 'deb https://developer.download.nvidia.com/compute/cuda/repos/{ubuntu_codename}/x86_64/ /' | tee /etc/apt/sources.list.d/nvidia-official-repo.list",
-            "apt update",
-            "apt-get install build-essential dkms linux-headers-$(uname -r) -y",
-            "apt-get install nvidia-driver-570 -y",
-        ]
+        # Install NVIDIA drivers; each list is (repo setup, install) commands
+        nvidia_570_commands = (
+            [
+                f"wget https://developer.download.nvidia.com/compute/cuda/repos/{ubuntu_codename}/x86_64/3bf863cc.pub",
+                "apt-key add 3bf863cc.pub",
+                f"echo 'deb https://developer.download.nvidia.com/compute/cuda/repos/{ubuntu_codename}/x86_64/ /' | tee /etc/apt/sources.list.d/nvidia-official-repo.list",
+            ],
+            [
+                "apt-get install --no-install-recommends -y build-essential dkms linux-headers-$(uname -r) nvidia-driver-570",
+            ],
+        )
 
-        nvidia_5090_commands = [
-            "apt install linux-headers-$(uname -r) -y",
-            f"wget https://developer.download.nvidia.com/compute/cuda/repos/{ubuntu_codename}/x86_64/cuda-keyring_1.1-1_all.deb",
-            "dpkg -i cuda-keyring_1.1-1_all.deb",
-            "apt update",
-            "apt install nvidia-open -y",
-            "nvidia-smi",
-        ]
+        nvidia_5090_commands = (
+            [
+                "apt install linux-headers-$(uname -r) -y",
+                f"wget https://developer.download.nvidia.com/compute/cuda/repos/{ubuntu_codename}/x86_64/cuda-keyring_1.1-1_all.deb",
+                "dpkg -i cuda-keyring_1.1-1_all.deb",
+            ],
+            [
+                "apt install nvidia-open -y",
+                "nvidia-smi",
+            ],
+        )
 
         if gpu_name and gpu_name == "rtx5090":
-            commands = nvidia_5090_commands
+            setup_commands, install_commands = nvidia_5090_commands
         else:
-            commands = nvidia_570_commands
+            setup_commands, install_commands = nvidia_570_commands
 
-        for cmd in commands:
+        for cmd in setup_commands:
+            run_ssh_command(ssh_client, cmd, task_id=task_id)
+
+        # A new apt source was added, so the package lists must be refreshed
+        self._apt_dirty[ssh_client.host] = True
+        self._apt_update(ssh_client, task_id)
+
+        for cmd in install_commands:
             run_ssh_command(ssh_client, cmd, task_id=task_id)
 
         log.info(f"NVIDIA drivers installed successfully on {control_input.hostname}")
@@ -631,19 +806,25 @@ EOF
         commands = [
             "curl -s -L https://nvidia.github.io/libnvidia-container/gpgkey | apt-key add -",
             "curl -s -L https://nvidia.github.io/libnvidia-container/stable/deb/libnvidia-container.list | tee /etc/apt/sources.list.d/libnvidia-container.list",
-            "apt-get update",
-            "DEBIAN_FRONTEND=noninteractive apt-get install -y nvidia-container-toolkit nvidia-container-runtime",
         ]
         for cmd in commands:
             run_ssh_command(ssh_client, cmd, task_id=task_id)
 
+        self._apt_dirty[ssh_client.host] = True
+        self._apt_update(ssh_client, task_id)
+        run_ssh_command(
+            ssh_client,
+            "DEBIAN_FRONTEND=noninteractive apt-get install -y nvidia-container-toolkit nvidia-container-runtime",
+            task_id=task_id,
+        )
+
     def _update_coredns_config(self, ssh_client, task_id: str):
         log.info("Updating CoreDNS configuration")
         try:
             time.sleep(5)
             run_ssh_command(
                 ssh_client,
-                "while ! kubectl -n kube-system get cm coredns >/dev/null 2>&1; do echo waiting for the coredns configmap resource ...; sleep 2; done",
+                "kubectl -n kube-system wait --for=create cm/coredns --timeout=120s",
                 task_id=task_id,
             )
 
@@ -666,19 +847,11 @@ EOF
     def _create_and_label_namespaces(self, ssh_client, task_id: str):
         log.info("Creating and labeling Kubernetes namespaces")
         try:
-            namespaces = ["akash-services", "lease"]
-            for ns in namespaces:
-                check_ns_command = (
-                    f"kubectl get ns {ns} > /dev/null 2>&1 || kubectl create ns {ns}"
-                )
-                run_ssh_command(ssh_client, check_ns_command, task_id=task_id)
-
-            label_commands = [
-                "kubectl label ns akash-services akash.network/name=akash-services akash.network=true --overwrite",
-                "kubectl label ns lease akash.network=true --overwrite",
-            ]
-            for cmd in label_commands:
-                run_ssh_command(ssh_client, cmd, task_id=task_id)
+            run_ssh_command(
+                ssh_client,
+                f"kubectl apply -f - <<'EOF'\n{NAMESPACES_MANIFEST}EOF",
+                task_id=task_id,
+            )
 
             log.info("Kubernetes namespaces created and labeled successfully")
         except Exception as e:
@@ -697,24 +870,21 @@ EOF
     ):
         log.info(f"Configuring NVIDIA runtime on {control_input.hostname}")
         config_file = "/etc/nvidia-container-runtime/config.toml"
-        check_file_cmd = f"[ -f {config_file} ] && echo 'exists' || echo 'not found'"
-        stdout, _ = run_ssh_command(ssh_client, check_file_cmd, task_id=task_id)
-
-        if "exists" in stdout:
-            run_ssh_command(
-                ssh_client,
-                f"sed -i 's/#accept-nvidia-visible-devices-as-volume-mounts = false/accept-nvidia-visible-devices-as-volume-mounts = true/' {config_file}",
-                task_id=task_id,
-            )
-            run_ssh_command(
-                ssh_client,
-                f"sed -i 's/#accept-nvidia-visible-devices-envvar-when-unprivileged = true/accept-nvidia-visible-devices-envvar-when-unprivileged = false/' {config_file}",
-                task_id=task_id,
-            )
-        else:
+        try:
+            ssh_client.sftp().stat(config_file)
+        except FileNotFoundError:
             log.warning(
                 f"NVIDIA runtime configuration file not found on {control_input.hostname}"
             )
+            return
+
+        configure_cmd = (
+            "sed -i"
+            " -e 's/#accept-nvidia-visible-devices-as-volume-mounts = false/accept-nvidia-visible-devices-as-volume-mounts = true/'"
+            " -e 's/#accept-nvidia-visible-devices-envvar-when-unprivileged = true/accept-nvidia-visible-devices-envvar-when-unprivileged = false/'"
+            f" {config_file}"
+        )
+        run_ssh_command(ssh_client, configure_cmd, task_id=task_id)
 
     def _reboot_node(
         self,
@@ -733,42 +903,46 @@ EOF
         )
 
         try:
-            # Initiate reboot and wait for node to go down
+            # Record the boot ID so the node's return can be told apart from
+            # sshd still answering while it shuts down
             with ssh_connection:
+                boot_id, _ = run_ssh_command(ssh_connection, BOOT_ID_CMD)
                 run_ssh_command(ssh_connection, "reboot", task_id=task_id)
-                time.sleep(60)  # Wait for node to go down
-
-            # Wait for node to come back online (max 5 minutes)
-            max_attempts = 30
-            retry_interval = 10
-
-            for attempt in range(max_attempts):
-                try:
-                    # Get new SSH connection
-                    new_connection = (
-                        connect_to_worker_node(ssh_client, control_input)
-                        if node_type == "worker_node"
-                        else get_ssh_client(control_input)
-                    )
+            time.sleep(5)
 
-                    # Verify node is up
-                    with new_connection as client:
-                        run_ssh_command(client, "uptime", task_id=task_id)
-                        log.info(f"Node {control_input.hostname} is back online")
-                        return
-
-                except Exception:
-                    if attempt < max_attempts - 1:
-                        log.info(
-                            f"Waiting for node {control_input.hostname} to come back online... "
-                            f"(attempt {attempt + 1}/{max_attempts})"
+            # Wait for node to come back online, probing the SSH port cheaply
+            # with exponential backoff before attempting a full SSH login
+            deadline = time.monotonic() + REBOOT_TIMEOUT
+            attempt = 0
+            while True:
+                if self._is_ssh_port_open(ssh_client, control_input, node_type):
+                    try:
+                        new_connection = (
+                            connect_to_worker_node(ssh_client, control_input)
+                            if node_type == "worker_node"
+                            else get_ssh_client(control_input)
                         )
-                        time.sleep(retry_interval)
-                    else:
-                        raise Exception(
-                            f"Node {control_input.hostname} did not come back online after reboot"
+                        with new_connection as client:
+                            new_boot_id, _ = run_ssh_command(client, BOOT_ID_CMD)
+                        if new_boot_id != boot_id:
+                            log.info(f"Node {control_input.hostname} is back online")
+                            return
+                    except Exception as e:
+                        log.debug(
+                            f"SSH not ready yet on {control_input.hostname}: {str(e)}"
                         )
 
+                if time.monotonic() >= deadline:
+                    raise Exception(
+                        f"Node {control_input.hostname} did not come back online after reboot"
+                    )
+                attempt += 1
+                log.info(
+                    f"Waiting for node {control_input.hostname} to come back online... "
+                    f"(attempt {attempt})"
+                )
+                time.sleep(min(REBOOT_MAX_BACKOFF, 1.5**attempt) + random.uniform(0, 1))
+
         except Exception as e:
             log.error(
                 f"Error during reboot process for node {control_input.hostname}: {str(e)}"
@@ -782,38 +956,31 @@ EOF
                 },
             )
 
+    def _is_ssh_port_open(
+        self, ssh_client, control_input: ControlMachineInput, node_type: str
+    ) -> bool:
+        """Check that the node accepts TCP connections on its SSH port.
+
+        Worker nodes are probed through the control node's transport.
+        """
+        address = (control_input.hostname, control_input.port)
+        try:
+            if node_type == "worker_node":
+                ssh_client.transport.open_channel(
+                    "direct-tcpip", address, ("", 0), timeout=REBOOT_PROBE_TIMEOUT
+                ).close()
+            else:
+                socket.create_connection(address, timeout=REBOOT_PROBE_TIMEOUT).close()
+            return True
+        except Exception:
+            return False
+
     def list_nodes(self, ssh_client):
         try:
             log.info("Listing nodes")
             # Get detailed node information in JSON format
-            command = """kubectl get nodes -o json | jq '{
-                    nodes: [.items[] | {
-                        name: .metadata.name,
-                        status: (
-                        (.status.conditions // [] | map(select(.type == "Ready")) | .[0]?.status) // "Unknown"
-                        ),
-                        roles: (
-                        [.metadata.labels | to_entries[]
-                            | select(.key | startswith("node-role.kubernetes.io/"))
-                            | .key
-                            | sub("node-role.kubernetes.io/"; "")
-                        ] | join(",")
-                        ),
-                        age: .metadata.creationTimestamp,
-                        version: .status.nodeInfo.kubeletVersion,
-                        internalIP: (
-                        (.status.addresses[]? | select(.type == "InternalIP") | .address) // "N/A"
-                        ),
-                        externalIP: (
-                        (.status.addresses[]? | select(.type == "ExternalIP") | .address) // "N/A"
-                        ),
-                        osImage: .status.nodeInfo.osImage,
-                        kernelVersion: .status.nodeInfo.kernelVersion,
-                        containerRuntime: .status.nodeInfo.containerRuntimeVersion
-                    }]}'"""
-            stdout, stderr = run_ssh_command(ssh_client, command)
-            stdout = json.loads(stdout)
-            return stdout
+            stdout, _ = run_ssh_command(ssh_client, "kubectl get nodes -o json")
+            return _shape_nodes(orjson.loads(stdout))
         except Exception as e:
             log.error(f"Error listing nodes: {str(e)}")
             raise ApplicationError(
@@ -827,11 +994,14 @@ EOF
 
     def _get_worker_ssh_client(self, control_ssh_client, node_internal_ip: str):
         """Create SSH client for worker node using key from control node."""
-        worker_keyfile_content, _ = run_ssh_command(
-            control_ssh_client, self.SSH_KEY_CMD, check_exit_status=True
-        )
+        with self._worker_key_lock:
+            if self._worker_keyfile_content is None:
+                stdout, _ = run_ssh_command(
+                    control_ssh_client, self.SSH_KEY_CMD, check_exit_status=True
+                )
+                self._worker_keyfile_content = stdout.encode()
         worker_keyfile = UploadFile(
-            filename="keyfile", file=io.BytesIO(worker_keyfile_content.encode())
+            filename="keyfile", file=io.BytesIO(self._worker_keyfile_content)
         )
 
         worker_input = WorkerNodeInput(
@@ -845,8 +1015,8 @@ EOF
     def _connect_to_worker_node(
         self, control_ssh_client, worker_input: WorkerNodeInput
     ):
-        """Connect to worker node through control node."""
-        return connect_to_worker_node(control_ssh_client, worker_input)
+        """Get a pooled connection to worker node through control node."""
+        return ssh_pool.acquire(worker_input, control_ssh_client)
 
     def _handle_unexpected_error(self, e, operation):
         log.error(f"Unexpected error during {operation}: {str(e)}")
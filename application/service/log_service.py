@@ -1,25 +1,39 @@
-import asyncio
-import json
+import orjson
 import time
 from typing import AsyncGenerator
 
-from application.utils.redis import get_redis_client
+from application.config.config import Config
+from application.utils.redis import get_async_redis_client
 from application.utils.logger import log
 from application.config.mongodb import logs_collection
 
+# XREADGROUP batch size bounds; the batch grows while a backlog is drained
+MIN_READ_COUNT = 10
+MAX_READ_COUNT = 100
+# XREADGROUP block time, which is also the heartbeat interval
+READ_BLOCK_MS = 5000
+
+# Server-sent event framing
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+_SSE_HEARTBEAT = b":\n\n"
+
+
+def _sse_frame(data: bytes) -> bytes:
+    return _SSE_PREFIX + data + _SSE_SUFFIX
+
 
 class LogService:
     def __init__(self):
-        self.redis_client = get_redis_client()
+        self.redis_client = get_async_redis_client()
 
     async def _initialize_stream(self, redis_key: str) -> bool:
         """Initialize Redis stream with an initial message"""
         try:
-            await asyncio.to_thread(
-                self.redis_client.xadd,
+            await self.redis_client.xadd(
                 redis_key,
                 {"init": "true"},
-                maxlen=10000,
+                maxlen=Config.LOG_STREAM_MAXLEN,
                 approximate=True,
             )
             return True
@@ -31,8 +45,7 @@ class LogService:
         """Create and verify consumer group"""
         try:
             # Create consumer group
-            await asyncio.to_thread(
-                self.redis_client.xgroup_create,
+            await self.redis_client.xgroup_create(
                 redis_key,
                 group_name,
                 "0",
@@ -45,7 +58,7 @@ class LogService:
 
         # Verify group creation
         try:
-            groups = await asyncio.to_thread(self.redis_client.xinfo_groups, redis_key)
+            groups = await self.redis_client.xinfo_groups(redis_key)
             return any(g["name"] == group_name for g in groups)
         except Exception as e:
             print(f"Error verifying group: {str(e)}")
@@ -63,20 +76,28 @@ class LogService:
 
         return None
 
-    async def _acknowledge_message(
-        self, redis_key: str, group_name: str, message_id: str
+    async def _acknowledge_messages(
+        self, redis_key: str, group_name: str, message_ids: list[str]
     ):
-        """Acknowledge message processing"""
-        await asyncio.to_thread(
-            self.redis_client.xack, redis_key, group_name, message_id
-        )
+        """Acknowledge processed messages in a single XACK"""
+        await self.redis_client.xack(redis_key, group_name, *message_ids)
+
+    async def _expire_stream(self, redis_key: str):
+        """Let an unwatched stream and its consumer groups expire after a while"""
+        # The group is kept so a reconnecting viewer resumes where it left off
+        # instead of replaying the stream, and other tabs keep their consumer
+        try:
+            await self.redis_client.expire(redis_key, Config.LOG_STREAM_TTL)
+        except Exception as e:
+            log.warning(f"Error setting expiry on log stream {redis_key}: {str(e)}")
 
     async def get_redis_logs(
         self, task_id: str, wallet_address: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Stream logs from Redis for a specific task, handling both stdout and stderr
         Using consumer groups for reliable message delivery
+        Yields the server-sent event frames of one poll at a time, or a heartbeat
         """
         redis_key = f"task:{task_id}"
         group_name = f"group:{task_id}"
@@ -84,64 +105,79 @@ class LogService:
 
         # Initialize stream and consumer group
         if not await self._initialize_stream(redis_key):
-            yield "Error initializing stream\n\n"
+            yield _sse_frame(b"Error initializing stream")
             return
 
         if not await self._setup_consumer_group(redis_key, group_name):
-            yield "Error setting up consumer group\n\n"
+            yield _sse_frame(b"Error setting up consumer group")
             return
 
         # Main message processing loop
-        while True:
-            try:
-                entries = await asyncio.to_thread(
-                    self.redis_client.xreadgroup,
-                    group_name,
-                    consumer_name,
-                    {redis_key: ">"},
-                    count=100,
-                    block=5000,
-                )
-
-                if entries:
-                    for stream, messages in entries:
+        try:
+            count = MIN_READ_COUNT
+            while True:
+                try:
+                    entries = await self.redis_client.xreadgroup(
+                        group_name,
+                        consumer_name,
+                        {redis_key: ">"},
+                        count=count,
+                        block=READ_BLOCK_MS,
+                    )
+
+                    frames = []
+                    ack_ids = []
+                    received = 0
+                    for stream, messages in entries or []:
+                        received += len(messages)
                         for message_id, message in messages:
                             log_entry = await self._process_message(message)
 
                             if log_entry:
-                                await self._acknowledge_message(
-                                    redis_key, group_name, message_id
-                                )
-                                yield f"{json.dumps(log_entry)}\n\n"
-                else:
-                    yield ""  # Heartbeat
-
-            except Exception as e:
-                print(f"Error reading stream: {str(e)}")
-                yield f"Error reading stream: {str(e)}\n\n"
-                break
-
-            await asyncio.sleep(0.1)
-
-    def get_mongo_logs(self, task_id: str) -> list[str]:
+                                ack_ids.append(message_id)
+                                frames.append(_sse_frame(orjson.dumps(log_entry)))
+
+                    if ack_ids:
+                        await self._acknowledge_messages(redis_key, group_name, ack_ids)
+                    yield b"".join(frames) if frames else _SSE_HEARTBEAT
+
+                    # A full batch means more is likely waiting
+                    count = (
+                        min(count * 2, MAX_READ_COUNT)
+                        if received >= count
+                        else MIN_READ_COUNT
+                    )
+
+                except Exception as e:
+                    print(f"Error reading stream: {str(e)}")
+                    yield _sse_frame(f"Error reading stream: {str(e)}".encode())
+                    break
+        finally:
+            # Runs on normal exit and when the client disconnects
+            await self._expire_stream(redis_key)
+
+    def get_mongo_logs(self, task_id: str) -> list[dict]:
         """
         Fetch archived logs from MongoDB for a specific task
         """
         try:
-            query = {"task_id": task_id}
-            log_document = logs_collection.find_one(query)
-
-            logs = []
-
-            if log_document and "logs" in log_document:
-                for log_entry in log_document["logs"]:
-                    formatted_log = {
-                        "type": log_entry["type"],
-                        "message": log_entry["message"],
-                    }
-                    logs.append(formatted_log)
-
-            return logs
+            # Let MongoDB unwind and project the entries instead of loading
+            # the whole document and rebuilding each entry in Python
+            cursor = logs_collection.aggregate(
+                [
+                    {"$match": {"task_id": task_id}},
+                    {"$unwind": "$logs"},
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "type": "$logs.type",
+                            "message": "$logs.message",
+                        }
+                    },
+                ],
+                batchSize=500,
+            )
+            return list(cursor)
 
         except Exception as e:
             log.error(f"Error reading MongoDB logs: {str(e)}")
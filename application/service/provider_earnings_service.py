@@ -1,4 +1,6 @@
-import requests
+import asyncio
+import httpx
+import time
 from datetime import date
 from typing import Dict, Any
 
@@ -8,13 +10,34 @@ from application.exception.application_error import ApplicationError
 from application.model.provider_earnings import ProviderEarningsResponse, EarningsData
 from fastapi import status
 
+# Earnings response cache settings
+EARNINGS_CACHE_MAX_SIZE = 1024
+EARNINGS_CACHE_TTL = 60  # seconds, for ranges that include today
+EARNINGS_CACHE_TTL_PAST = 3600  # seconds, for ranges entirely in the past
+
+# Upstream retry settings; backoff is factor * 2 ** attempt seconds
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
 
 class ProviderEarningsService:
     def __init__(self):
         self.console_api_base_url = Config.CONSOLE_API_BASE_URL
         self.timeout = 30
-
-    def get_provider_earnings(
+        # Shared client so keep-alive connections are reused across requests
+        # The transport retries failed connection attempts
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            transport=httpx.AsyncHTTPTransport(
+                retries=RETRY_ATTEMPTS,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            ),
+        )
+        # (wallet_address, from_date, to_date) -> (expires_at, earnings_data)
+        self._cache = {}
+
+    async def get_provider_earnings(
         self, wallet_address: str, from_date: date, to_date: date
     ) -> ProviderEarningsResponse:
         """
@@ -49,10 +72,19 @@ class ProviderEarningsService:
                 f"Fetching provider earnings for wallet {wallet_address} from {from_date_str} to {to_date_str}"
             )
 
-            # Make request to internal API
-            earnings_data = self._make_internal_api_request(
-                internal_url, params, wallet_address
-            )
+            # Serve repeated polls of the same window from the cache
+            cache_key = (wallet_address, from_date_str, to_date_str)
+            earnings_data = self._get_cached(cache_key)
+            if earnings_data is None:
+                earnings_data = await self._make_internal_api_request(
+                    internal_url, params, wallet_address
+                )
+                ttl = (
+                    EARNINGS_CACHE_TTL_PAST
+                    if to_date < date.today()
+                    else EARNINGS_CACHE_TTL
+                )
+                self._set_cached(cache_key, earnings_data, ttl)
 
             # The response structure is: {"earnings": {"totalUAktEarned": ..., "totalUUsdcEarned": ..., "totalUUsdEarned": ...}}
             # We pass it through as-is
@@ -73,6 +105,24 @@ class ProviderEarningsService:
                 },
             ) from e
 
+    def _get_cached(self, key: tuple) -> Dict[str, Any] | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        return data
+
+    def _set_cached(self, key: tuple, data: Dict[str, Any], ttl: int) -> None:
+        """Cache a successful response; errors are raised and never cached."""
+        self._cache.pop(key, None)
+        while len(self._cache) >= EARNINGS_CACHE_MAX_SIZE:
+            # Dicts keep insertion order, so this evicts the oldest entry
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = (time.monotonic() + ttl, data)
+
     def _validate_date_range(self, from_date: date, to_date: date) -> None:
         """Validate the date range."""
         if from_date > to_date:
@@ -97,12 +147,26 @@ class ProviderEarningsService:
                 },
             )
 
-    def _make_internal_api_request(
+    async def _get_with_retry(self, url: str, params: Dict[str, str]) -> httpx.Response:
+        """GET the url, retrying transient gateway errors with exponential backoff."""
+        for attempt in range(RETRY_ATTEMPTS + 1):
+            response = await self._client.get(url, params=params)
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt == RETRY_ATTEMPTS
+            ):
+                return response
+            log.warning(
+                f"Internal API returned {response.status_code}, retrying (attempt {attempt + 1}/{RETRY_ATTEMPTS})"
+            )
+            await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2**attempt)
+
+    async def _make_internal_api_request(
         self, url: str, params: Dict[str, str], wallet_address: str
     ) -> Dict[str, Any]:
         """Make request to internal API with proper error handling."""
         try:
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = await self._get_with_retry(url, params)
 
             if response.status_code == 200:
                 return response.json()
@@ -139,7 +203,7 @@ class ProviderEarningsService:
                     },
                 )
 
-        except requests.Timeout:
+        except httpx.TimeoutException:
             log.error(f"Timeout while calling internal API for wallet {wallet_address}")
             raise ApplicationError(
                 status_code=status.HTTP_504_GATEWAY_TIMEOUT,
@@ -149,7 +213,7 @@ class ProviderEarningsService:
                     "message": "Internal service request timed out",
                 },
             )
-        except requests.ConnectionError:
+        except httpx.ConnectError:
             log.error(
                 f"Connection error while calling internal API for wallet {wallet_address}"
             )
@@ -161,7 +225,7 @@ class ProviderEarningsService:
                     "message": "Internal service is currently unavailable",
                 },
             )
-        except requests.RequestException as e:
+        except httpx.RequestError as e:
             log.error(
                 f"Request exception while calling internal API for wallet {wallet_address}: {str(e)}"
             )
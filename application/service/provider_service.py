@@ -1,32 +1,163 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import status
+import asyncio
 import base64
+import httpx
+import io
 import json
+import orjson
+import shlex
+import threading
 import time
-import requests
+import yaml
 
 from application.exception.application_error import ApplicationError
 from application.config.config import Config
 from application.utils.logger import log
-from application.utils.ssh_utils import run_ssh_command
+from application.utils.ssh_utils import run_ssh_command, run_ssh_command_stream
 from application.utils.redis import get_redis_client
-from application.config.mongodb import logs_collection
+from application.utils.log_writer import task_log_writer
+from application.utils.download_cache import get_cached_file
+
+# Constants
+STEP_MARKER: str = "::step::"
+PRICING_SCRIPT_PATH: str = "~/provider/price_script_generic.sh"
+PRICING_SCRIPT_SENTINEL: str = "__END__"
+LOG_PERSIST_INTERVAL: int = 30
+STATUS_CHECK_TIMEOUT: int = 10
+PRICING_FILE_CACHE_SIZE: int = 16
+
+INGRESS_NGINX_VALUES = {
+    "controller": {
+        "service": {"type": "ClusterIP"},
+        "ingressClassResource": {"name": "akash-ingress-class"},
+        "kind": "DaemonSet",
+        "hostPort": {"enabled": True},
+        "admissionWebhooks": {"port": 7443},
+        "config": {
+            "allow-snippet-annotations": False,
+            "compute-full-forwarded-for": True,
+            "proxy-buffer-size": "16k",
+        },
+        "metrics": {"enabled": True},
+        "extraArgs": {"enable-ssl-passthrough": True},
+    },
+    "tcp": {
+        "8443": "akash-services/akash-provider:8443",
+        "8444": "akash-services/akash-provider:8444",
+    },
+}
+
+NVIDIA_RUNTIME_CLASS = {
+    "kind": "RuntimeClass",
+    "apiVersion": "node.k8s.io/v1",
+    "metadata": {"name": "nvidia"},
+    "handler": "nvidia",
+}
+
+
+def _batch_script(commands) -> str:
+    """Join commands into one fail-fast script, echoing a marker before each step.
+
+    The script itself arrives on bash's stdin, so each step reads from
+    /dev/null instead; a heredoc inside a step still takes precedence.
+    """
+    lines = ["set -euo pipefail"]
+    for cmd in commands:
+        step = cmd.strip().splitlines()[0]
+        lines.append(f"echo {shlex.quote(f'{STEP_MARKER} {step}')}")
+        lines.append(f"{{\n{cmd.strip()}\n}} </dev/null")
+    return "\n".join(lines) + "\n"
+
+
+def _upload_yaml(sftp, data, remote_path: str):
+    """Write data as YAML to a path relative to the remote home directory."""
+    # putfo directly skips the cwd and remote-dir lookups Connection.put does.
+    # Write beside the target and rename so readers never see a partial file
+    temp_path = f"{remote_path}.tmp"
+    sftp.putfo(io.BytesIO(yaml.safe_dump(data, sort_keys=False).encode()), temp_path)
+    sftp.posix_rename(temp_path, remote_path)
+
+
+def _with_yaml_stdin(command: str, data) -> str:
+    """Feed data as YAML to the command's stdin through a quoted heredoc."""
+    return f"{command} <<'EOF'\n{yaml.safe_dump(data, sort_keys=False)}EOF"
+
+
+def _read_remote_b64(sftp, remote_path: str) -> str:
+    """Read a file relative to the remote home directory and base64-encode it."""
+    with sftp.open(remote_path, "rb") as remote_file:
+        return base64.b64encode(remote_file.read()).decode()
+
+
+# Shared by every ProviderService so the network status polls reuse keep-alive
+# connections; closed from the application's shutdown handler
+_STATUS_CLIENT = httpx.AsyncClient(
+    timeout=STATUS_CHECK_TIMEOUT,
+    limits=httpx.Limits(max_keepalive_connections=4),
+)
+
+# (host, mtime, size) -> encoded script, shared across requests so unchanged
+# scripts are not re-read; least recently used entries are evicted first
+_PRICING_FILE_CACHE = OrderedDict()
+_PRICING_FILE_LOCK = threading.Lock()
+
+
+async def close_status_client():
+    await _STATUS_CLIENT.aclose()
+
+
+def _attribute_value(value: str):
+    # Boolean attributes are stored as YAML booleans, everything else as strings
+    return value == "true" if value in ("true", "false") else value
 
 
 class ProviderService:
+    def __init__(self):
+        self._pricing_cache = {}
+
+    def _run_steps(self, ssh_client, commands, task_id: str):
+        """Run a phase's commands as a single script piped to one remote bash."""
+
+        def log_step(line):
+            if line.startswith(STEP_MARKER):
+                log.info(f"Running: {line[len(STEP_MARKER):].strip()}")
+
+        run_ssh_command_stream(
+            ssh_client,
+            "bash -s",
+            task_id=task_id,
+            on_line=log_step,
+            stdin=_batch_script(commands).encode(),
+        )
 
     def _install_helm(self, ssh_client, task_id: str):
         log.info("Installing Helm...")
         helm_version = Config.HELM_VERSION
-        commands = [
-            f"wget https://get.helm.sh/helm-{helm_version}-linux-amd64.tar.gz",
-            f"tar -zxvf helm-{helm_version}-linux-amd64.tar.gz",
-            "sudo install linux-amd64/helm /usr/local/bin/helm",
-            f"rm -rf linux-amd64 helm-{helm_version}-linux-amd64.tar.gz",
-        ]
+        tarball = f"helm-{helm_version}-linux-amd64.tar.gz"
         try:
-            for cmd in commands:
-                time.sleep(2)
-                output, _ = run_ssh_command(ssh_client, cmd, False, task_id=task_id)
+            installed_version, _ = run_ssh_command(
+                ssh_client,
+                "command -v helm >/dev/null && helm version --template '{{.Version}}'",
+                check_exit_status=False,
+            )
+            if installed_version.strip() == helm_version:
+                log.info(f"Helm {helm_version} is already installed.")
+                return
+
+            # Download once into the local cache and push it, instead of having
+            # every control node fetch the release from the internet
+            tarball_path = get_cached_file(
+                f"{Config.HELM_BINARY_MIRROR_URL.rstrip('/')}/{tarball}", tarball
+            )
+            ssh_client.put(str(tarball_path), remote=tarball)
+            commands = [
+                f"tar -zxf {tarball}",
+                "sudo install linux-amd64/helm /usr/local/bin/helm",
+                f"rm -rf linux-amd64 {tarball}",
+            ]
+            self._run_steps(ssh_client, commands, task_id)
             log.info("Helm installation completed successfully.")
         except Exception as e:
             log.error(f"Error during Helm installation: {str(e)}")
@@ -39,7 +170,8 @@ class ProviderService:
                 },
             )
 
-    def _setup_helm_repos(self, ssh_client, task_id: str):
+    def _setup_helm_repos(self, ssh_client, gpu_support: bool, task_id: str):
+        """Add every chart repository the provider setup uses, then index them once."""
         log.info("Setting up Helm repositories...")
         repo_name = "akash" if Config.CHAIN_ID == "akashnet-2" else "akash-dev"
         repo_url = ("https://akash-network.github.io/helm-charts" if repo_name == "akash" 
@@ -48,15 +180,18 @@ class ProviderService:
         commands = [
             f"helm repo remove {repo_name} 2>/dev/null || true",
             f"helm repo add {repo_name} {repo_url}",
+            "helm repo add ingress-nginx https://kubernetes.github.io/ingress-nginx --force-update",
         ]
-        
+        if gpu_support:
+            commands.append(
+                "helm repo add nvdp https://nvidia.github.io/k8s-device-plugin --force-update"
+            )
+
         if repo_name == "akash-dev":
             commands.append("helm search repo akash-dev --devel")
             
         commands.append("helm repo update")
-        for cmd in commands:
-            time.sleep(2)
-            run_ssh_command(ssh_client, cmd, task_id=task_id)
+        self._run_steps(ssh_client, commands, task_id)
         log.info("Helm and Akash repository setup completed.")
 
     def _install_akash_services(
@@ -70,19 +205,29 @@ class ProviderService:
         # Common helm install parameters
         namespace = "-n akash-services"
         version_tag = f"--set image.tag={provider_version}"
+        wait_flags = "--wait --timeout 300s"
         
         commands = [
-            f"helm install akash-hostname-operator {repo_prefix}/akash-hostname-operator {namespace} {version_tag}{devel_flag}",
-            f"helm install inventory-operator {repo_prefix}/akash-inventory-operator {namespace} {version_tag}{devel_flag}",
+            f"helm upgrade --install akash-hostname-operator {repo_prefix}/akash-hostname-operator {namespace} {version_tag} {wait_flags}{devel_flag}",
+            f"helm upgrade --install inventory-operator {repo_prefix}/akash-inventory-operator {namespace} {version_tag} {wait_flags}{devel_flag}",
         ]
         
-        # Add akash-node installation only for mainnet
+        # Add akash-node installation only for mainnet. It is not waited on here:
+        # the node only turns ready once synced, which the readiness task tracks
         if chain_id == "akashnet-2":
             node_version_tag = f"--set image.tag={node_version}"
-            commands.append(f"helm install akash-node akash/akash-node {namespace} {node_version_tag}")
-        for cmd in commands:
-            time.sleep(2)
-            run_ssh_command(ssh_client, cmd, task_id=task_id)
+            commands.append(f"helm upgrade --install akash-node akash/akash-node {namespace} {node_version_tag}")
+
+        # The releases are independent, so install them side by side, each on
+        # its own channel of the shared connection
+        max_workers = min(Config.SSH_MAX_PARALLEL_COMMANDS, len(commands))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(run_ssh_command_stream, ssh_client, cmd, task_id=task_id)
+                for cmd in commands
+            ]
+            for future in as_completed(futures):
+                future.result()
         log.info("Akash services installed.")
 
     def _prepare_provider_config(
@@ -99,66 +244,63 @@ class ProviderService:
         task_id: str,
     ):
         log.info("Preparing provider configuration...")
-        time.sleep(2)
-        config_content = f"""
-cat > ~/provider/provider.yaml << EOF
----
-from: "{account_address}"
-key: "{self._get_base64_encoded_key(ssh_client)}"
-keysecret: "{base64.b64encode(key_password.encode()).decode()}"
-domain: "{domain}"
-node: "{f'http://akash-node-1:26657' if chain_id == 'akashnet-2' else 'https://rpc.sandbox-2.aksh.pw:443'}"
-withdrawalperiod: 12h
-chainid: "{chain_id}"
-organization: "{organization}"
-email: "{email}"
-attributes:
-"""
-        # Format attributes
-        for attr in attributes:
-            key = attr.key
-            value = attr.value
-            config_content += f"  - key: {key}\n    value: {value}\n"
-
-        # Add pricing information
-        config_content += f"""
-price_target_cpu: {pricing.cpu}
-price_target_memory: {pricing.memory}
-price_target_hd_ephemeral: {pricing.storage}
-price_target_gpu_mappings: '*={pricing.gpu}'
-price_target_endpoint: {pricing.endpointBidPrice}
-price_target_hd_pers_hdd: {pricing.persistentStorage}
-price_target_hd_pers_nvme: {pricing.persistentStorage}
-price_target_hd_pers_ssd: {pricing.persistentStorage}
-price_target_ip: {pricing.ipScalePrice}
-EOF
-"""
-        run_ssh_command(
-            ssh_client, f"mkdir -p ~/provider && {config_content}", task_id=task_id
-        )
+        # The connection keeps a single SFTP session; fetch it once for all steps
+        sftp = ssh_client.sftp()
+        provider_config = {
+            "from": account_address,
+            "key": self._get_base64_encoded_key(sftp),
+            "keysecret": base64.b64encode(key_password.encode()).decode(),
+            "domain": domain,
+            "node": (
+                "http://akash-node-1:26657"
+                if chain_id == "akashnet-2"
+                else "https://rpc.sandbox-2.aksh.pw:443"
+            ),
+            "withdrawalperiod": "12h",
+            "chainid": chain_id,
+            "organization": organization,
+            "email": email,
+            "attributes": [
+                {"key": attr.key, "value": _attribute_value(attr.value)}
+                for attr in attributes
+            ],
+            "price_target_cpu": pricing.cpu,
+            "price_target_memory": pricing.memory,
+            "price_target_hd_ephemeral": pricing.storage,
+            "price_target_gpu_mappings": f"*={pricing.gpu}",
+            "price_target_endpoint": pricing.endpointBidPrice,
+            "price_target_hd_pers_hdd": pricing.persistentStorage,
+            "price_target_hd_pers_nvme": pricing.persistentStorage,
+            "price_target_hd_pers_ssd": pricing.persistentStorage,
+            "price_target_ip": pricing.ipScalePrice,
+        }
+
+        # Upload over SFTP so user-supplied values never pass through a shell
+        try:
+            sftp.mkdir("provider")
+        except IOError:
+            pass  # Already exists
+        _upload_yaml(sftp, provider_config, "provider/provider.yaml")
         log.info("Provider configuration prepared.")
 
     def _install_akash_crds(self, ssh_client, provider_version, task_id: str):
         log.info("Installing CRDs for Akash provider...")
-        time.sleep(5)
-        run_ssh_command(
+        crd_url = f"https://raw.githubusercontent.com/akash-network/provider/v{provider_version}/pkg/apis/akash.network/crd.yaml"
+        run_ssh_command_stream(
+            ssh_client, f"kubectl apply -f {crd_url}", task_id=task_id
+        )
+        # The provider chart needs the CRDs to be served before it is installed
+        run_ssh_command_stream(
             ssh_client,
-            f"kubectl apply -f https://raw.githubusercontent.com/akash-network/provider/v{provider_version}/pkg/apis/akash.network/crd.yaml",
+            f"kubectl wait --for=condition=Established -f {crd_url} --timeout=120s",
             task_id=task_id,
         )
         log.info("Akash provider CRDs installed.")
 
     def _install_akash_provider(self, ssh_client, provider_version, task_id: str):
         log.info("Installing Akash provider...")
-        time.sleep(5)
         try:
-            # Get the pricing script content and encode it
-            pricing_script = self._get_pricing_script(ssh_client, task_id)
-            pricing_script_b64 = (
-                base64.b64encode(pricing_script.encode()).decode()
-                if pricing_script
-                else None
-            )
+            pricing_script_b64 = self._get_pricing_script(ssh_client, task_id)
 
             # Prepare the Helm install command
             # Determine helm repo and flags based on chain ID
@@ -166,7 +308,7 @@ EOF
             devel_flag = "" if Config.CHAIN_ID == "akashnet-2" else "--devel"
             
             install_cmd = (
-                f"helm install akash-provider {helm_repo}/provider "
+                f"helm upgrade --install akash-provider {helm_repo}/provider "
                 f"-n akash-services -f ~/provider/provider.yaml "
                 f"--set image.tag={provider_version} {devel_flag}".strip()
             )
@@ -174,8 +316,8 @@ EOF
             if pricing_script_b64:
                 install_cmd += f" --set bidpricescript='{pricing_script_b64}'"
 
-            # Run the Helm install command
-            run_ssh_command(ssh_client, install_cmd, task_id=task_id)
+            # Run the Helm install command, streaming its progress to the task log
+            run_ssh_command_stream(ssh_client, install_cmd, task_id=task_id)
 
             log.info("Akash provider installation completed.")
         except Exception as e:
@@ -189,85 +331,50 @@ EOF
             )
 
     def _get_pricing_script(self, ssh_client, task_id):
+        """Return the base64-encoded pricing script, downloading it if needed."""
+        if task_id in self._pricing_cache:
+            return self._pricing_cache[task_id]
         try:
-            # Check if the pricing script exists
-            result = run_ssh_command(
-                ssh_client,
-                "test -f ~/provider/price_script_generic.sh && echo 'exists' || echo 'not found'",
-                task_id=task_id,
-            )
-            if "exists" in result[0]:
-                # If it exists, read its content
-                time.sleep(2)
-                content = run_ssh_command(
-                    ssh_client,
-                    "cat ~/provider/price_script_generic.sh",
-                    task_id=task_id,
-                )[0]
-                return content.strip()
-            else:
-                # If pricing script URL is provided, download it
-                pricing_script_url = Config.PROVIDER_PRICE_SCRIPT_URL
-                if pricing_script_url:
-                    log.info(f"Downloading pricing script from {pricing_script_url}")
-                    run_ssh_command(
-                        ssh_client,
-                        f"wget {pricing_script_url} -O ~/provider/price_script_generic.sh",
-                        task_id=task_id,
-                    )
-                    time.sleep(2)
-                    content = run_ssh_command(
-                        ssh_client,
-                        "cat ~/provider/price_script_generic.sh",
-                        task_id=task_id,
-                    )[0]
-                    return content.strip()
+            # Fetch the script if missing and encode it in a single round trip
+            pricing_script_url = Config.PROVIDER_PRICE_SCRIPT_URL
+            command = f"base64 -w0 {PRICING_SCRIPT_PATH}"
+            if pricing_script_url:
+                command = (
+                    f"[ -f {PRICING_SCRIPT_PATH} ] || "
+                    f"{{ wget -q {pricing_script_url} -O {PRICING_SCRIPT_PATH}.tmp && "
+                    f"mv {PRICING_SCRIPT_PATH}.tmp {PRICING_SCRIPT_PATH}; }}; {command}"
+                )
+            # Trailing sentinel carries the exit status, telling a missing
+            # script apart from an empty one without a separate probe
+            command = f"{command}; echo {PRICING_SCRIPT_SENTINEL}$?"
+            # Not logged to the task: the output is the encoded script itself
+            output, _ = run_ssh_command(ssh_client, command, check_exit_status=False)
+            encoded, _, exit_code = output.rpartition(PRICING_SCRIPT_SENTINEL)
+            pricing_script_b64 = encoded.strip() or None
+            if exit_code.strip() != "0":
+                pricing_script_b64 = None
                 log.info("Pricing script not found. Proceeding without it.")
-                return None
+            elif not pricing_script_b64:
+                log.info("Pricing script is empty. Proceeding without it.")
         except Exception as e:
             log.warning(
                 f"Error while trying to get pricing script: {str(e)}. Proceeding without it."
             )
             return None
+        self._pricing_cache[task_id] = pricing_script_b64
+        return pricing_script_b64
 
     def _install_nginx_ingress(self, ssh_client, task_id: str):
         log.info("Installing NGINX Ingress Controller...")
-        ingress_config = """
-cat > ingress-nginx-custom.yaml << EOF
-controller:
-  service:
-    type: ClusterIP
-  ingressClassResource:
-    name: "akash-ingress-class"
-  kind: DaemonSet
-  hostPort:
-    enabled: true
-  admissionWebhooks:
-    port: 7443
-  config:
-    allow-snippet-annotations: false
-    compute-full-forwarded-for: true
-    proxy-buffer-size: "16k"
-  metrics:
-    enabled: true
-  extraArgs:
-    enable-ssl-passthrough: true
-tcp:
-  "8443": "akash-services/akash-provider:8443"
-  "8444": "akash-services/akash-provider:8444"
-EOF
-"""
-        time.sleep(2)
-        run_ssh_command(ssh_client, ingress_config, task_id=task_id)
         commands = [
-            "helm repo add ingress-nginx https://kubernetes.github.io/ingress-nginx",
-            f"helm upgrade --install ingress-nginx ingress-nginx/ingress-nginx --version {Config.INGRESS_NGINX_VERSION} --namespace ingress-nginx --create-namespace -f ~/ingress-nginx-custom.yaml --set controller.admissionWebhooks.enabled=false",
+            _with_yaml_stdin(
+                f"helm upgrade --install ingress-nginx ingress-nginx/ingress-nginx --version {Config.INGRESS_NGINX_VERSION} --namespace ingress-nginx --create-namespace -f - --set controller.admissionWebhooks.enabled=false --wait --atomic --timeout 300s",
+                INGRESS_NGINX_VALUES,
+            ),
             "kubectl label ns ingress-nginx app.kubernetes.io/name=ingress-nginx app.kubernetes.io/instance=ingress-nginx",
             "kubectl label ingressclass akash-ingress-class akash.network=true",
         ]
-        for cmd in commands:
-            time.sleep(2)
-            run_ssh_command(ssh_client, cmd, task_id=task_id)
+        self._run_steps(ssh_client, commands, task_id)
         log.info("NGINX Ingress Controller installation completed.")
 
     def _configure_gpu_support(
@@ -276,42 +383,6 @@ EOF
         try:
             log.info("Configuring NVIDIA Runtime Engine...")
 
-            nvidia_runtime_class_config = """
-cat > nvidia-runtime-class.yaml << EOF
-kind: RuntimeClass
-apiVersion: node.k8s.io/v1
-metadata:
-  name: nvidia
-handler: nvidia
-EOF
-"""
-            run_ssh_command(ssh_client, nvidia_runtime_class_config, task_id=task_id)
-            time.sleep(2)
-            run_ssh_command(
-                ssh_client,
-                "kubectl apply -f ~/nvidia-runtime-class.yaml",
-                task_id=task_id,
-            )
-
-            log.info("Labeling $node for NVIDIA support...")
-
-            for node in install_gpu_driver_nodes:
-                time.sleep(2)
-                log.info(f"Labeling {node} for NVIDIA support...")
-                label_command = f"kubectl label nodes {node} allow-nvdp=true nvidia.com/gpu.present=true --overwrite"
-                run_ssh_command(ssh_client, label_command, task_id=task_id)
-
-            log.info("Adding NVIDIA Device Plugin Helm repository...")
-            run_ssh_command(
-                ssh_client,
-                "helm repo add nvdp https://nvidia.github.io/k8s-device-plugin",
-                task_id=task_id,
-            )
-            time.sleep(2)
-            log.info("Updating Helm repositories...")
-            run_ssh_command(ssh_client, "helm repo update", task_id=task_id)
-
-            log.info("Installing NVIDIA Device Plugin...")
             nvidia_device_plugin_command = f"""
 helm upgrade -i nvdp nvdp/nvidia-device-plugin \
 --namespace nvidia-device-plugin \
@@ -321,10 +392,13 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
 --set deviceListStrategy=volume-mounts \
 --set-string nodeSelector.allow-nvdp="true"
 """
-            run_ssh_command(ssh_client, nvidia_device_plugin_command, task_id=task_id)
-
-            time.sleep(10)
-            run_ssh_command(ssh_client, "systemctl restart k3s", task_id=task_id)
+            commands = [
+                _with_yaml_stdin("kubectl apply -f -", NVIDIA_RUNTIME_CLASS),
+                f"kubectl label nodes {' '.join(map(shlex.quote, install_gpu_driver_nodes))} allow-nvdp=true nvidia.com/gpu.present=true --overwrite",
+                nvidia_device_plugin_command,
+                "systemctl restart k3s",
+            ]
+            self._run_steps(ssh_client, commands, task_id)
             log.info("NVIDIA Device Plugin installation completed.")
             log.info("NVIDIA Runtime Engine configuration completed.")
         except Exception as e:
@@ -338,53 +412,77 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
                 },
             )
 
-    def _check_akash_node_readiness(self, ssh_client, task_id: str):
+    async def _check_akash_node_readiness(self, ssh_client, task_id: str):
         log.info("Checking Akash node readiness")
         redis_client = get_redis_client()
+        # Log lines are sent to Redis once per poll in a single pipeline and
+        # persisted to MongoDB at most every LOG_PERSIST_INTERVAL seconds
+        pending_stream = []
+        logs_to_append = []
+        last_persist = time.monotonic()
+
+        def emit(stream, message):
+            pending_stream.append({stream: message})
+            logs_to_append.append({"type": stream, "message": message})
+
+        def flush(persist=False):
+            nonlocal last_persist
+            if pending_stream:
+                pipe = redis_client.pipeline(transaction=False)
+                for fields in pending_stream:
+                    pipe.xadd(
+                        f"task:{task_id}",
+                        fields,
+                        maxlen=Config.LOG_STREAM_MAXLEN,
+                        approximate=True,
+                    )
+                pipe.execute()
+                pending_stream.clear()
+            if logs_to_append and (
+                persist or time.monotonic() - last_persist >= LOG_PERSIST_INTERVAL
+            ):
+                task_log_writer.append(task_id, logs_to_append)
+                logs_to_append.clear()
+                last_persist = time.monotonic()
+
         try:
             # First check if pod is running
             pod_timeout = 1800  # 30 minutes
             sync_timeout = 6000  # 100 minutes
             check_interval = 10  # Check every 10 seconds
             start_time = time.time()
-            logs_to_append = []
-            time.sleep(5)
             # Phase 1: Wait for pod to be running
             log.info("Phase 1: Checking if Akash node pod is running")
+            waiting_reported = False
             while time.time() - start_time < pod_timeout:
-                stdout, _ = run_ssh_command(
+                # Watches the pod for the rest of the timeout and returns as soon
+                # as it runs; it only fails fast while the pod does not exist yet
+                remaining = max(int(pod_timeout - (time.time() - start_time)), 1)
+                stdout, _ = await asyncio.to_thread(
+                    run_ssh_command,
                     ssh_client,
-                    "kubectl get pod akash-node-1-0 -n akash-services -o json | jq -c '{status: .status.phase}'",
+                    f"kubectl wait --for=jsonpath='{{.status.phase}}'=Running pod/akash-node-1-0 -n akash-services --timeout={remaining}s",
                     check_exit_status=False,
                     task_id=task_id,
                 )
-
-                try:
-                    status_data = json.loads(stdout)
-                    if status_data.get("status") == "Running":
-                        message = "Akash node pod is running, proceeding to sync check"
-                        log.info(message)
-                        redis_client.xadd(f"task:{task_id}", {"stdout": message})
-                        logs_to_append.append({"type": "stdout", "message": message})
-                        break
-                except json.JSONDecodeError as e:
-                    log.debug(f"Failed to parse JSON response: {e}")
-                    message = f"Failed to parse JSON response: {e}"
+                if "condition met" in stdout:
+                    message = "Akash node pod is running, proceeding to sync check"
+                    log.info(message)
+                    emit("stdout", message)
+                    break
+                if not waiting_reported:
+                    message = "Akash node pod not created yet, waiting for it to start"
                     log.debug(message)
-                    redis_client.xadd(f"task:{task_id}", {"stderr": message})
-                    logs_to_append.append({"type": "stderr", "message": message})
-                message = f"Akash node pod not ready yet, waiting {check_interval} seconds before next check"
-                log.debug(message)
-                redis_client.xadd(f"task:{task_id}", {"stderr": message})
-                logs_to_append.append({"type": "stderr", "message": message})
-                time.sleep(check_interval)
+                    emit("stderr", message)
+                    await asyncio.to_thread(flush)
+                    waiting_reported = True
+                await asyncio.sleep(check_interval)
             else:
                 message = (
                     f"Akash node pod did not become ready within {pod_timeout} seconds"
                 )
                 log.error(message)
-                redis_client.xadd(f"task:{task_id}", {"stderr": message})
-                logs_to_append.append({"type": "stderr", "message": message})
+                emit("stderr", message)
                 raise ApplicationError(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     error_code="PROVIDER_006",
@@ -397,27 +495,26 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
             # Phase 2: Check node sync status
             message = "Checking Akash node sync status"
             log.info(message)
-            redis_client.xadd(f"task:{task_id}", {"stdout": message})
-            logs_to_append.append({"type": "stdout", "message": message})
+            emit("stdout", message)
             sync_start_time = time.time()
             while time.time() - sync_start_time < sync_timeout:
-                # Get node status
-                stdout, _ = run_ssh_command(
-                    ssh_client,
-                    "kubectl exec -it akash-node-1-0 -n akash-services -c akash-node -- akash status",
-                    check_exit_status=False,
-                    task_id=task_id,
-                )
-
                 try:
-                    node_status = json.loads(stdout)
-
-                    # Get network status from Polkachu RPC using requests
-                    response = requests.get(
-                        f"{Config.AKASH_NODE_STATUS_CHECK}/status", timeout=10
+                    # Get node status and network status from Polkachu RPC at once
+                    (stdout, _), response = await asyncio.gather(
+                        asyncio.to_thread(
+                            run_ssh_command,
+                            ssh_client,
+                            "kubectl exec akash-node-1-0 -n akash-services -c akash-node -- akash status --output json",
+                            check_exit_status=False,
+                            task_id=task_id,
+                        ),
+                        _STATUS_CLIENT.get(
+                            f"{Config.AKASH_NODE_STATUS_CHECK}/status"
+                        ),
                     )
+                    node_status = orjson.loads(stdout)
                     response.raise_for_status()
-                    network_status = response.json()
+                    network_status = orjson.loads(response.content)
 
                     # Extract block heights
                     node_height = int(node_status["sync_info"]["latest_block_height"])
@@ -429,21 +526,16 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
                     if node_status["sync_info"]["catching_up"]:
                         message = f"Node is still catching up. Current height: {node_height}, Network height: {network_height}"
                         log.debug(message)
-                        redis_client.xadd(f"task:{task_id}", {"stdout": message})
-                        logs_to_append.append({"type": "stdout", "message": message})
-                        time.sleep(check_interval)
-                        continue
-
+                        emit("stdout", message)
                     # Check if node is within 5 blocks of network height
-                    if network_height - node_height <= 5:
+                    elif network_height - node_height <= 5:
                         message = f"Node is synced. Height: {node_height}, Network height: {network_height}"
                         log.info(message)
-                        redis_client.xadd(f"task:{task_id}", {"stdout": message})
-                        logs_to_append.append({"type": "stdout", "message": message})
+                        emit("stdout", message)
 
-                        # Restart k3s and operator-inventory to apply the changes
-                        time.sleep(20)
-                        run_ssh_command(
+                        # Restart operator-inventory to apply the changes
+                        await asyncio.to_thread(
+                            run_ssh_command,
                             ssh_client,
                             "kubectl rollout restart deployment operator-inventory -n akash-services",
                             task_id=task_id,
@@ -454,45 +546,24 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
                             "node_height": node_height,
                             "network_height": network_height,
                         }
-                    message = f"Node not fully synced. Current height: {node_height}, Network height: {network_height}"
-                    log.debug(message)
-                    redis_client.xadd(f"task:{task_id}", {"stderr": message})
-                    logs_to_append.append({"type": "stderr", "message": message})
-
-                    if logs_to_append:
-                        logs_collection.update_one(
-                            {"task_id": task_id},
-                            {
-                                "$push": {"logs": {"$each": logs_to_append}},
-                                "$setOnInsert": {"task_id": task_id},
-                            },
-                            upsert=True,
-                        )
-                except json.JSONDecodeError as e:
+                    else:
+                        message = f"Node not fully synced. Current height: {node_height}, Network height: {network_height}"
+                        log.debug(message)
+                        emit("stderr", message)
+                except orjson.JSONDecodeError as e:
                     log.debug(f"Failed to parse JSON response: {e}")
-                    redis_client.xadd(
-                        f"task:{task_id}",
-                        {"stderr": f"Failed to parse JSON response: {e}"},
-                    )
-                except requests.RequestException as e:
+                    emit("stderr", f"Failed to parse JSON response: {e}")
+                except httpx.HTTPError as e:
                     log.debug(f"Failed to fetch network status: {e}")
-                    redis_client.xadd(
-                        f"task:{task_id}",
-                        {"stderr": f"Failed to fetch network status: {e}"},
-                    )
+                    emit("stderr", f"Failed to fetch network status: {e}")
                 except KeyError as e:
                     log.debug(f"Missing expected key in response: {e}")
-                    redis_client.xadd(
-                        f"task:{task_id}",
-                        {"stderr": f"Missing expected key in response: {e}"},
-                    )
-                time.sleep(check_interval)
+                    emit("stderr", f"Missing expected key in response: {e}")
+                await asyncio.to_thread(flush)
+                await asyncio.sleep(check_interval)
 
             log.error("Akash node did not sync within the timeout period")
-            redis_client.xadd(
-                f"task:{task_id}",
-                {"stderr": "Akash node did not sync within the timeout period"},
-            )
+            emit("stderr", "Akash node did not sync within the timeout period")
             raise ApplicationError(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 error_code="PROVIDER_007",
@@ -506,63 +577,78 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
             raise
         except Exception as e:
             self._handle_unexpected_error(e, "Akash node readiness check")
+        finally:
+            try:
+                await asyncio.to_thread(flush, True)
+            except Exception as e:
+                log.warning(f"Failed to flush readiness check logs: {str(e)}")
 
-    async def update_provider_attributes(self, ssh_client, attributes, task_id: str):
-        # Construct the attributes string for yq
-        attr_string = ",".join(
-            [
-                f'{{"key":"{attr["key"]}","value":{attr["value"] if attr["value"] == "true" or attr["value"] == "false" else f'"{attr["value"]}"'}}}'
+    async def update_provider(
+        self,
+        ssh_client,
+        attributes=None,
+        pricing=None,
+        domain=None,
+        email=None,
+        task_id: str = None,
+    ):
+        """Apply any combination of config changes with one yq edit and one restart."""
+        expressions = []
+        if attributes is not None:
+            # Construct the attributes list for yq as a compact JSON literal
+            attr_list = [
+                {"key": attr["key"], "value": _attribute_value(attr["value"])}
                 for attr in attributes
             ]
+            expressions.append(
+                f".attributes = {json.dumps(attr_list, separators=(',', ':'))}"
+            )
+        if pricing is not None:
+            expressions += [
+                f".price_target_cpu = {pricing['cpu']}",
+                f".price_target_memory = {pricing['memory']}",
+                f".price_target_hd_ephemeral = {pricing['storage']}",
+                f".price_target_gpu_mappings = {json.dumps(f'*={pricing['gpu']}')}",
+                f".price_target_endpoint = {pricing['endpointBidPrice']}",
+                f".price_target_hd_pers_hdd = {pricing['persistentStorage']}",
+                f".price_target_hd_pers_nvme = {pricing['persistentStorage']}",
+                f".price_target_hd_pers_ssd = {pricing['persistentStorage']}",
+                f".price_target_ip = {pricing['ipScalePrice']}",
+            ]
+        if domain is not None:
+            expressions.append(f".domain = {json.dumps(domain)}")
+        if email is not None:
+            expressions.append(f".email = {json.dumps(email)}")
+        if not expressions:
+            return
+
+        # String values are JSON literals and the whole expression is one
+        # quoted argument, so quotes in user input cannot break either layer
+        yq_command = f"yq eval {shlex.quote(' | '.join(expressions))} -i ~/provider/provider.yaml"
+        await asyncio.to_thread(
+            run_ssh_command, ssh_client, yq_command, task_id=task_id
         )
-        yq_command = (
-            f"yq eval '.attributes = [{attr_string}]' -i ~/provider/provider.yaml"
-        )
-
-        run_ssh_command(ssh_client, yq_command, task_id=task_id)
+        await self.restart_provider_service(ssh_client, task_id=task_id)
 
-        await self.restart_provider_service(ssh_client)
+    async def update_provider_attributes(self, ssh_client, attributes, task_id: str):
+        await self.update_provider(ssh_client, attributes=attributes, task_id=task_id)
         log.info("Provider attributes updated successfully.")
 
     async def get_provider_pricing(self, ssh_client):
-        command = """yq '. | with_entries(select(.key | test("^price_target_")))' ~/provider/provider.yaml -o json | jq -c ."""
-        output, _ = run_ssh_command(ssh_client, command)
-        return json.loads(output.strip())
+        command = """yq '. | with_entries(select(.key | test("^price_target_")))' ~/provider/provider.yaml -o json"""
+        output, _ = await asyncio.to_thread(run_ssh_command, ssh_client, command)
+        return orjson.loads(output)
 
     async def update_provider_pricing(self, ssh_client, pricing, task_id: str):
-        run_ssh_command(
-            ssh_client,
-            f"""yq eval '.price_target_cpu = {pricing['cpu']} |
-         .price_target_memory = {pricing['memory']} |
-         .price_target_hd_ephemeral = {pricing['storage']} |
-         .price_target_gpu_mappings = "*={pricing['gpu']}" |
-         .price_target_endpoint = {pricing['endpointBidPrice']} |
-         .price_target_hd_pers_hdd = {pricing['persistentStorage']} |
-         .price_target_hd_pers_nvme = {pricing['persistentStorage']} |
-         .price_target_hd_pers_ssd = {pricing['persistentStorage']} |
-         .price_target_ip = {pricing['ipScalePrice']}' -i ~/provider/provider.yaml
-""",
-            task_id=task_id,
-        )
-        await self.restart_provider_service(ssh_client)
+        await self.update_provider(ssh_client, pricing=pricing, task_id=task_id)
         log.info("Provider pricing updated successfully.")
 
     async def update_provider_domain(self, ssh_client, domain, task_id: str):
-        run_ssh_command(
-            ssh_client,
-            f"yq eval '.domain = \"{domain}\"' -i ~/provider/provider.yaml",
-            task_id=task_id,
-        )
-        await self.restart_provider_service(ssh_client)
+        await self.update_provider(ssh_client, domain=domain, task_id=task_id)
         log.info("Provider domain updated successfully.")
 
     async def update_provider_email(self, ssh_client, email, task_id: str):
-        run_ssh_command(
-            ssh_client,
-            f"yq eval '.email = \"{email}\"' -i ~/provider/provider.yaml",
-            task_id=task_id,
-        )
-        await self.restart_provider_service(ssh_client)
+        await self.update_provider(ssh_client, email=email, task_id=task_id)
         log.info("Provider email updated successfully.")
 
 
@@ -578,12 +664,10 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
         log.info("Provider service uninstalled successfully.")
 
 
-    def _get_base64_encoded_key(self, ssh_client):
+    def _get_base64_encoded_key(self, sftp):
         log.info("Retrieving and encoding the key...")
         try:
-            command = "cat ~/key.pem | openssl base64 -A"
-            output, _ = run_ssh_command(ssh_client, command)
-            encoded_key = output.strip()
+            encoded_key = _read_remote_b64(sftp, "key.pem")
             log.info("Key successfully retrieved and encoded.")
             return encoded_key
         except Exception as e:
@@ -597,13 +681,38 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
                 },
             )
 
-    async def restart_provider_service(self, ssh_client):
+    def _read_pricing_script(self, ssh_client):
+        """Return the encoded pricing script, re-reading it only when it changed."""
+        sftp = ssh_client.sftp()
+        remote_path = "provider/price_script_generic.sh"
+        attrs = sftp.stat(remote_path)
+        key = (ssh_client.host, attrs.st_mtime, attrs.st_size)
+        with _PRICING_FILE_LOCK:
+            pricing_script_b64 = _PRICING_FILE_CACHE.get(key)
+            if pricing_script_b64 is not None:
+                _PRICING_FILE_CACHE.move_to_end(key)
+                return pricing_script_b64
+
+        pricing_script_b64 = _read_remote_b64(sftp, remote_path)
+        with _PRICING_FILE_LOCK:
+            _PRICING_FILE_CACHE[key] = pricing_script_b64
+            while len(_PRICING_FILE_CACHE) > PRICING_FILE_CACHE_SIZE:
+                _PRICING_FILE_CACHE.popitem(last=False)
+        return pricing_script_b64
+
+    async def restart_provider_service(self, ssh_client, task_id: str = None):
         log.info("Restarting provider service...")
         try:
-            # Get base64 encoded pricing script
-            command = "cat ~/provider/price_script_generic.sh | openssl base64 -A"
-            output, _ = run_ssh_command(ssh_client, command)
-            pricing_script_b64 = output.strip()
+            # Get base64 encoded pricing script, reusing it if this task fetched it
+            pricing_script_b64 = self._pricing_cache.get(task_id)
+            if pricing_script_b64 is None:
+                try:
+                    pricing_script_b64 = await asyncio.to_thread(
+                        self._read_pricing_script, ssh_client
+                    )
+                except IOError:
+                    log.warning("Pricing script not found, restarting without it.")
+                    pricing_script_b64 = ""
             provider_version = Config.PROVIDER_SERVICES_VERSION.replace("v", "")
 
             # Upgrade helm chart with the pricing script
@@ -618,10 +727,11 @@ helm upgrade -i nvdp nvdp/nvidia-device-plugin \
                 f'--set bidpricescript="{pricing_script_b64}" '
                 f'--set image.tag={provider_version} {devel_flag}'
             ).strip()
-            run_ssh_command(ssh_client, command)
+            await asyncio.to_thread(run_ssh_command, ssh_client, command)
 
-            time.sleep(10)
-            run_ssh_command(
+            await asyncio.sleep(10)
+            await asyncio.to_thread(
+                run_ssh_command,
                 ssh_client,
                 "kubectl rollout restart deployment operator-inventory -n akash-services",
             )
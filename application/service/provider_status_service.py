@@ -1,17 +1,45 @@
+import asyncio
+
 import httpx
+import orjson
 import urllib3
 
 from application.utils.logger import log
 
+# Provider certificates are self-signed, so verification is disabled once here
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Shared client so repeated status probes reuse pooled keep-alive connections
+_client = httpx.AsyncClient(
+    verify=False,
+    timeout=20.0,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+)
+
+# provider_uri -> in-flight probe, shared by concurrent callers
+_inflight = {}
+
 
 async def check_provider_online_status_v2(chain_id: str, provider_uri: str):
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    # Concurrent checks of the same provider wait on a single request
+    task = _inflight.get(provider_uri)
+    if task is None:
+        task = asyncio.create_task(_fetch_provider_status(provider_uri))
+        _inflight[provider_uri] = task
+        task.add_done_callback(lambda _: _inflight.pop(provider_uri, None))
+    # Shielded so one caller disconnecting does not cancel the others' probe
+    return await asyncio.shield(task)
 
+
+async def _fetch_provider_status(provider_uri: str):
     try:
-        async with httpx.AsyncClient(verify=False, timeout=20.0) as client:
-            response = await client.get(f"{provider_uri}/status")
-            response.raise_for_status()
-            return response.json()
+        response = await _client.get(f"{provider_uri}/status")
+        response.raise_for_status()
+        return orjson.loads(response.content)
     except (httpx.RequestError, httpx.TimeoutException, httpx.HTTPStatusError) as e:
         log.error(f"Error checking provider online status v2: {e}")
         return False
+
+
+async def close_status_client():
+    await _client.aclose()
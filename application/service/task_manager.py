@@ -1,26 +1,37 @@
+import asyncio
+from functools import partial
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from application.utils.logger import log
 from application.model.task import Task, TaskStatus
 from application.data.action_repository import (
     insert_action,
     find_action,
     update_task_status,
-    update_action_status,
+    update_action,
     update_action_time,
 )
 
+# Constants
+TASK_STATUS_FLUSH_INTERVAL: float = 1.0
+
 
 class TaskManager:
     def __init__(self):
         self.tasks: Dict[str, Dict[str, Task]] = {}
+        self._completed: Dict[str, int] = {}
+        self._levels: Dict[str, List[List[str]]] = {}
 
     def create_action(
         self, action_id: str, action_name: str, tasks: List[Task]
     ) -> None:
         """
         Create a new action with the given tasks.
+
+        Raises ValueError before anything is stored if a task depends on an
+        unknown or later task.
         """
+        levels = self._dependency_levels(tasks)
         action_data = {
             "_id": action_id,
             "name": action_name,
@@ -41,6 +52,8 @@ class TaskManager:
         }
         insert_action(action_data)
         self.tasks[action_id] = {task.name: task for task in tasks}
+        self._completed[action_id] = 0
+        self._levels[action_id] = levels
 
     async def run_action(self, action_id: str) -> None:
         """
@@ -50,57 +63,106 @@ class TaskManager:
         if not action:
             raise ValueError(f"Action {action_id} not found")
 
-        start_time = datetime.utcnow()
+        start_time = datetime.now(timezone.utc)
         self._update_action_time(action_id, start_time=start_time)
 
-        for task_data in action["tasks"]:
-            task_name = task_data["name"]
-            await self._run_task(action_id, task_name)
+        final_status = None
+        for level in self._levels[action_id]:
+            # Tasks in the same level do not depend on each other
+            await asyncio.gather(
+                *(self._run_task(action_id, task_name) for task_name in level),
+                return_exceptions=True,
+            )
 
-            if self.tasks[action_id][task_name].status == TaskStatus.FAILED:
-                self._update_action_status(action_id, TaskStatus.FAILED.value)
+            if any(
+                self.tasks[action_id][task_name].status == TaskStatus.FAILED
+                for task_name in level
+            ):
+                final_status = TaskStatus.FAILED.value
                 break
 
-        if all(
-            task.status == TaskStatus.COMPLETED
-            for task in self.tasks[action_id].values()
+        if final_status is None and self._completed[action_id] == len(
+            self.tasks[action_id]
         ):
-            self._update_action_status(action_id, TaskStatus.COMPLETED.value)
-        self._update_action_time(action_id, end_time=datetime.utcnow())
+            final_status = TaskStatus.COMPLETED.value
+        self._finish_action(action_id, final_status, datetime.now(timezone.utc))
+
+    @staticmethod
+    def _dependency_levels(tasks: List[Task]) -> List[List[str]]:
+        """
+        Group the tasks of an action into levels whose tasks can run concurrently.
+
+        A task without declared dependencies depends on every task before it, so
+        actions that declare none still run strictly in order.
+        """
+        levels: List[List[str]] = []
+        task_levels: Dict[str, int] = {}
+        for task in tasks:
+            task_name = task.name
+            if task.depends_on is None:
+                level = len(levels)
+            else:
+                unknown = [dep for dep in task.depends_on if dep not in task_levels]
+                if unknown:
+                    raise ValueError(
+                        f"Task {task_name} depends on unknown or later tasks: {unknown}"
+                    )
+                level = max(
+                    (task_levels[dep] + 1 for dep in task.depends_on), default=0
+                )
+
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(task_name)
+            task_levels[task_name] = level
+        return levels
 
     async def _run_task(self, action_id: str, task_name: str) -> None:
         """
         Run a single task and update its status.
         """
-        start_time = datetime.utcnow()
-        self._update_task_status(
-            action_id, task_name, TaskStatus.IN_PROGRESS.value, start_time=start_time
+        start_time = datetime.now(timezone.utc)
+        # Only tasks still running after TASK_STATUS_FLUSH_INTERVAL get a separate
+        # in-progress write; shorter ones persist start and end in one update
+        in_progress_write = asyncio.get_running_loop().call_later(
+            TASK_STATUS_FLUSH_INTERVAL,
+            partial(
+                self._update_task_status,
+                action_id,
+                task_name,
+                TaskStatus.IN_PROGRESS.value,
+                start_time=start_time,
+            ),
         )
 
         try:
             task = self.tasks[action_id][task_name]
             await task.run()
-            end_time = datetime.utcnow()
-            status = (
-                TaskStatus.COMPLETED.value
-                if task.status == TaskStatus.COMPLETED
-                else TaskStatus.FAILED.value
-            )
+            in_progress_write.cancel()
+            end_time = datetime.now(timezone.utc)
+            if task.status == TaskStatus.COMPLETED:
+                self._completed[action_id] += 1
+                status = TaskStatus.COMPLETED.value
+            else:
+                status = TaskStatus.FAILED.value
             self._update_task_status(
                 action_id,
                 task_name,
                 status,
                 error_message=task.error_message,
+                start_time=start_time,
                 end_time=end_time,
             )
         except Exception as e:
-            end_time = datetime.utcnow()
+            in_progress_write.cancel()
+            end_time = datetime.now(timezone.utc)
             log.error(f"Error in task {task_name}: {str(e)}")
             self._update_task_status(
                 action_id,
                 task_name,
                 TaskStatus.FAILED.value,
                 error_message=str(e),
+                start_time=start_time,
                 end_time=end_time,
             )
 
@@ -152,9 +214,14 @@ class TaskManager:
         end_time: datetime = None,
     ) -> None:
         """
-        Update the status of a task in the database.
+        Update the status of a task and the resulting action status in one write.
         """
-        update_data = {"$set": {f"tasks.$[elem].status": status}}
+        update_data = {
+            "$set": {
+                f"tasks.$[elem].status": status,
+                "status": self._aggregate_status(action_id, task_name, status),
+            }
+        }
         if error_message:
             update_data["$set"]["tasks.$[elem].error_message"] = error_message
         if start_time:
@@ -163,7 +230,6 @@ class TaskManager:
             update_data["$set"]["tasks.$[elem].end_time"] = end_time
 
         update_task_status(action_id, update_data, task_name)
-        self._update_action_status(action_id)
 
     def _update_action_time(
         self, action_id: str, start_time: datetime = None, end_time: datetime = None
@@ -180,23 +246,31 @@ class TaskManager:
         if update_data:
             update_action_time(action_id, update_data)
 
-    def _update_action_status(self, action_id: str, status: str = None) -> None:
+    def _finish_action(self, action_id: str, status: str, end_time: datetime) -> None:
         """
-        Update the status of an action in the database.
+        Record the final status and end time of an action in one write.
         """
+        update_data = {"end_time": end_time}
         if status:
-            update_action_status(action_id, status)
-        else:
-            action = find_action(action_id)
-            task_statuses = [task["status"] for task in action["tasks"]]
-
-            if TaskStatus.FAILED.value in task_statuses:
-                new_status = TaskStatus.FAILED.value
-            elif TaskStatus.IN_PROGRESS.value in task_statuses:
-                new_status = TaskStatus.IN_PROGRESS.value
-            elif all(status == TaskStatus.COMPLETED.value for status in task_statuses):
-                new_status = TaskStatus.COMPLETED.value
-            else:
-                new_status = TaskStatus.NOT_STARTED.value
+            update_data["status"] = status
+        update_action(action_id, update_data)
 
-            update_action_status(action_id, new_status)
+    def _aggregate_status(self, action_id: str, task_name: str, status: str) -> str:
+        """
+        Derive the action status from the in-memory tasks, with the given task
+        taking its new status, instead of re-reading the action from the database.
+        """
+        task_statuses = [
+            status if name == task_name else task.status.value
+            for name, task in self.tasks[action_id].items()
+        ]
+
+        if TaskStatus.FAILED.value in task_statuses:
+            return TaskStatus.FAILED.value
+        if TaskStatus.IN_PROGRESS.value in task_statuses:
+            return TaskStatus.IN_PROGRESS.value
+        if all(
+            task_status == TaskStatus.COMPLETED.value for task_status in task_statuses
+        ):
+            return TaskStatus.COMPLETED.value
+        return TaskStatus.NOT_STARTED.value
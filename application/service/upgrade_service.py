@@ -1,5 +1,6 @@
 from packaging import version
 import asyncio
+import base64
 import json
 from typing import Dict, Tuple
 from fastapi import status
@@ -13,8 +14,8 @@ from application.utils.logger import log
 
 class UpgradeService:
     def __init__(self):
-        self.AKASH_NODE_HELM_CHECK_CMD = "helm list -n akash-services -o json | jq '.[] | select(.name == \"akash-node\")'"
-        self.PROVIDER_HELM_CHECK_CMD = "helm list -n akash-services -o json | jq '.[] | select(.name == \"akash-provider\")'"
+        self.AKASH_NODE_HELM_CHECK_CMD = "helm list -n akash-services -o json --filter '^akash-node$'"
+        self.PROVIDER_HELM_CHECK_CMD = "helm list -n akash-services -o json --filter '^akash-provider$'"
 
     def _get_helm_release_versions(
         self, ssh_client, release_type: str
@@ -34,7 +35,9 @@ class UpgradeService:
         display_name = "Akash Node" if release_type == "node" else "Akash Provider"
 
         stdout, _ = run_ssh_command(ssh_client, cmd, True)
-        helm_data = json.loads(stdout)
+        # helm filters the release list itself, so no jq process is needed
+        releases = json.loads(stdout)
+        helm_data = releases[0] if releases else None
 
         if not helm_data:
             raise ApplicationError(
@@ -346,15 +349,17 @@ class UpgradeService:
             for cmd in price_script_cmds:
                 run_ssh_command(ssh_client, cmd, True, task_id=task_id)
 
-            # Upgrade provider chart
+            # Upgrade provider chart, encoding the price script locally
             log.info("Upgrading provider chart...")
+            with ssh_client.sftp().open("provider/price_script_generic.sh", "rb") as f:
+                pricing_script_b64 = base64.b64encode(f.read()).decode()
             if Config.CHAIN_ID == "akashnet-2":
                 provider_upgrade_cmd = (
-                    f"helm upgrade akash-provider akash/provider -n akash-services -f ~/provider/provider.yaml --set bidpricescript=\"$(cat ~/provider/price_script_generic.sh | openssl base64 -A)\" --set image.tag={app_version}"
+                    f"helm upgrade akash-provider akash/provider -n akash-services -f ~/provider/provider.yaml --set bidpricescript='{pricing_script_b64}' --set image.tag={app_version}"
                 )
             else:
                 provider_upgrade_cmd = (
-                    f"helm upgrade akash-provider akash-dev/provider -n akash-services -f ~/provider/provider.yaml --set bidpricescript=\"$(cat ~/provider/price_script_generic.sh | openssl base64 -A)\" --set image.tag={app_version} --devel"
+                    f"helm upgrade akash-provider akash-dev/provider -n akash-services -f ~/provider/provider.yaml --set bidpricescript='{pricing_script_b64}' --set image.tag={app_version} --devel"
                 )
             run_ssh_command(ssh_client, provider_upgrade_cmd, True, task_id=task_id)
 
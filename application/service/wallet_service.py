@@ -207,10 +207,11 @@ class WalletService:
                     },
                 )
 
-            run_ssh_command(self.ssh_client, "rm -f ~/key.pem")
-            store_command = f"cat > ~/key.pem << EOF\n{exported_key}\nEOF"
-            run_ssh_command(self.ssh_client, store_command)
-            run_ssh_command(self.ssh_client, "chmod 600 ~/key.pem")
+            # Write the key over SFTP so its content never passes through a
+            # remote shell, restricting permissions before anything is written
+            with self.ssh_client.sftp().open("key.pem", "w") as key_file:
+                key_file.chmod(0o600)
+                key_file.write(exported_key)
             log.info("Key exported and stored successfully in ~/key.pem")
 
         except Exception as e:
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import requests
+from fastapi import status
+
+from application.config.config import Config
+from application.exception.application_error import ApplicationError
+from application.utils.logger import log
+
+# Constants
+DOWNLOAD_TIMEOUT: int = 60
+
+_download_lock = threading.Lock()
+
+
+def get_cached_file(url: str, filename: str, sha256: str = None) -> Path:
+    """Download a file into the local cache once and return its path."""
+    cache_dir = Path(Config.DOWNLOAD_CACHE_DIR)
+    path = cache_dir / filename
+
+    with _download_lock:
+        # A cached copy is only trusted if it still matches the expected checksum
+        if path.exists() and (not sha256 or _matches(path.read_bytes(), sha256)):
+            return path
+
+        log.info(f"Downloading {url} to {path}")
+        try:
+            response = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            log.error(f"Error downloading {url}: {str(e)}")
+            raise ApplicationError(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                error_code="DOWNLOAD_001",
+                payload={
+                    "error": "Download Failed",
+                    "message": f"Failed to download {url}: {str(e)}",
+                },
+            )
+
+        content = response.content
+        if sha256 and not _matches(content, sha256):
+            log.error(f"Checksum mismatch for {url}")
+            raise ApplicationError(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                error_code="DOWNLOAD_002",
+                payload={
+                    "error": "Checksum Mismatch",
+                    "message": f"SHA-256 checksum of {url} does not match the expected value",
+                },
+            )
+
+        # Write to a temporary file first so a partial download is never cached
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.tmp")
+        temp_path.write_bytes(content)
+        os.replace(temp_path, path)
+        return path
+
+
+def _matches(content: bytes, sha256: str) -> bool:
+    return hashlib.sha256(content).hexdigest() == sha256.lower()
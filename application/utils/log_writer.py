@@ -0,0 +1,72 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from pymongo import UpdateOne
+
+from application.config.mongodb import logs_collection
+from application.utils.logger import log
+
+# Constants
+LOG_WRITE_INTERVAL: float = 1.0
+
+
+class TaskLogWriter:
+    """Persist task log entries to MongoDB in periodic unordered bulk writes.
+
+    Entries are buffered per task and written by a background thread every
+    LOG_WRITE_INTERVAL seconds, so concurrent tasks share one round trip
+    instead of each issuing its own update. All pending entries of a task go
+    into a single update, which keeps their order within the task even though
+    the bulk write itself is unordered.
+    """
+
+    def __init__(self, interval: float = LOG_WRITE_INTERVAL):
+        self._interval = interval
+        self._pending = defaultdict(list)  # task_id -> log entries
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def append(self, task_id: str, entries: list) -> None:
+        """Queue log entries for a task; they are persisted on the next flush."""
+        if not entries:
+            return
+        with self._lock:
+            self._pending[task_id].extend(entries)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="task-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Write all pending entries in one unordered bulk write."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(list)
+        if not pending:
+            return
+        operations = [
+            UpdateOne(
+                {"task_id": task_id},
+                {
+                    "$push": {"logs": {"$each": entries}},
+                    "$setOnInsert": {"task_id": task_id},
+                },
+                upsert=True,
+            )
+            for task_id, entries in pending.items()
+        ]
+        try:
+            logs_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            log.error(f"Failed to persist task logs: {str(e)}")
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            self.flush()
+
+
+task_log_writer = TaskLogWriter()
+atexit.register(task_log_writer.flush)
@@ -1,7 +1,21 @@
 import redis
+import redis.asyncio
 from application.config.config import Config
 
+# Bounded pool shared by every thread: callers wait for a free connection
+# instead of opening a new socket per concurrent task
 redis_client = redis.StrictRedis(
+    connection_pool=redis.BlockingConnectionPool(
+        host=Config.REDIS_URI,
+        port=Config.REDIS_PORT,
+        password=Config.REDIS_PASSWORD,
+        decode_responses=True,
+        max_connections=Config.REDIS_MAX_CONNECTIONS,
+    )
+)
+
+# Shared by all async consumers, so connections are pooled across requests
+async_redis_client = redis.asyncio.StrictRedis(
     host=Config.REDIS_URI,
     port=Config.REDIS_PORT,
     password=Config.REDIS_PASSWORD,
@@ -11,3 +25,7 @@ redis_client = redis.StrictRedis(
 
 def get_redis_client():
     return redis_client
+
+
+def get_async_redis_client():
+    return async_redis_client
@@ -1,18 +1,33 @@
+import hashlib
 import tempfile
+import threading
+import time
 import os
+import weakref
+from collections import OrderedDict, deque
 from fabric import Connection
 from invoke.exceptions import UnexpectedExit, AuthFailure
-from typing import Union, Tuple
+from typing import Callable, Optional, Union, Tuple
 from fastapi import status
+from application.config.config import Config
 from application.exception.application_error import ApplicationError
 from application.model.machine_input import ControlMachineInput, WorkerNodeInput
 from application.utils.logger import log
 from application.utils.redis import get_redis_client
-from application.config.mongodb import logs_collection
+from application.utils.log_writer import task_log_writer
 
 # Constants
 SSH_TIMEOUT: int = 30
 LOCAL_ADDR: Tuple[str, int] = ("", 0)
+LOG_FLUSH_LINES: int = 100
+ERROR_TAIL_LINES: int = 20
+POOL_MAX_SIZE: int = 64
+POOL_IDLE_TIMEOUT: int = 300
+TRANSPORT_WINDOW_SIZE: int = 4 * 1024 * 1024
+TRANSPORT_MAX_PACKET_SIZE: int = 128 * 1024
+
+_CHANNEL_SLOTS = weakref.WeakKeyDictionary()  # transport -> BoundedSemaphore
+_CHANNEL_SLOTS_LOCK = threading.Lock()
 
 
 # Custom exception classes
@@ -51,7 +66,9 @@ def get_ssh_client(
             "timeout": SSH_TIMEOUT,
         }
 
-        if "key_filename" in connection_params:
+        if "pkey" in connection_params:
+            connect_kwargs["pkey"] = connection_params["pkey"]
+        elif "key_filename" in connection_params:
             connect_kwargs["key_filename"] = connection_params["key_filename"]
             if "passphrase" in connection_params:
                 connect_kwargs["passphrase"] = connection_params["passphrase"]
@@ -66,6 +83,7 @@ def get_ssh_client(
         )
         # Test the connection
         connection.open()
+        _tune_transport(connection)
         log.info(f"SSH connection established to {machine_input.hostname}")
         return connection
     except AuthFailure as auth_ex:
@@ -78,6 +96,30 @@ def get_ssh_client(
         raise SSHConnectionError(str(e))
 
 
+def _tune_transport(connection: Connection) -> None:
+    """Use a larger window and packet size for channels opened from now on."""
+    transport = connection.transport
+    transport.default_window_size = TRANSPORT_WINDOW_SIZE
+    transport.default_max_packet_size = TRANSPORT_MAX_PACKET_SIZE
+
+
+def _channel_slots(connection: Connection) -> threading.BoundedSemaphore:
+    """Return the semaphore bounding the channels open at once on a connection.
+
+    sshd refuses sessions beyond its MaxSessions limit, so commands run from
+    several threads over one connection wait here for a free slot instead.
+    """
+    if not connection.is_connected:
+        connection.open()
+    transport = connection.transport
+    with _CHANNEL_SLOTS_LOCK:
+        slots = _CHANNEL_SLOTS.get(transport)
+        if slots is None:
+            slots = threading.BoundedSemaphore(Config.SSH_MAX_PARALLEL_COMMANDS)
+            _CHANNEL_SLOTS[transport] = slots
+    return slots
+
+
 def _prepare_connection_params(
     input: Union[ControlMachineInput, WorkerNodeInput]
 ) -> dict:
@@ -90,7 +132,11 @@ def _prepare_connection_params(
         "timeout": SSH_TIMEOUT,
     }
 
-    if input.keyfile:
+    # Only the machine inputs carry a parsed key; build nodes do not have the field
+    pkey = getattr(input, "pkey", None)
+    if pkey:
+        connection_params["pkey"] = pkey
+    elif input.keyfile:
         temp_file = _handle_keyfile(input.keyfile)
         connection_params["key_filename"] = temp_file.name
         if input.passphrase:
@@ -98,13 +144,13 @@ def _prepare_connection_params(
     elif input.password:
         connection_params["password"] = input.password
     else:
-        log.error("Neither keyfile nor password provided for SSH connection")
+        log.error("Neither keyfile, pkey nor password provided for SSH connection")
         raise ApplicationError(
             status_code=status.HTTP_400_BAD_REQUEST,
             error_code="AUTH_002",
             payload={
                 "error": "Authentication Error",
-                "message": "Either keyfile or password must be provided",
+                "message": "Either keyfile, pkey or password must be provided",
             },
         )
 
@@ -146,7 +192,8 @@ def run_ssh_command(
     try:
         redis_client = get_redis_client()
 
-        result = connection.run(command, warn=not check_exit_status, **kwargs)
+        with _channel_slots(connection):
+            result = connection.run(command, warn=not check_exit_status, **kwargs)
         stdout_str = result.stdout.strip()
         stderr_str = result.stderr.strip()
 
@@ -159,7 +206,12 @@ def run_ssh_command(
             if stdout_str:
                 for line in result.stdout.splitlines():
                     # Add to Redis stream
-                    redis_client.xadd(f"task:{task_id}", {"stdout": line})
+                    redis_client.xadd(
+                        f"task:{task_id}",
+                        {"stdout": line},
+                        maxlen=Config.LOG_STREAM_MAXLEN,
+                        approximate=True,
+                    )
                     # Prepare for MongoDB
                     logs_to_append.append(
                         {
@@ -171,7 +223,12 @@ def run_ssh_command(
             if stderr_str:
                 for line in result.stderr.splitlines():
                     # Add to Redis stream
-                    redis_client.xadd(f"task:{task_id}", {"stderr": line})
+                    redis_client.xadd(
+                        f"task:{task_id}",
+                        {"stderr": line},
+                        maxlen=Config.LOG_STREAM_MAXLEN,
+                        approximate=True,
+                    )
                     # Prepare for MongoDB
                     logs_to_append.append(
                         {
@@ -180,16 +237,8 @@ def run_ssh_command(
                         }
                     )
 
-            # Update MongoDB document with new logs
-            if logs_to_append:
-                logs_collection.update_one(
-                    {"task_id": task_id},
-                    {
-                        "$push": {"logs": {"$each": logs_to_append}},
-                        "$setOnInsert": {"task_id": task_id},
-                    },
-                    upsert=True,
-                )
+            # Queue the logs for the next batched MongoDB write
+            task_log_writer.append(task_id, logs_to_append)
 
         return stdout_str, stderr_str
     except UnexpectedExit as e:
@@ -204,6 +253,69 @@ def run_ssh_command(
         )
 
 
+def run_ssh_command_stream(
+    connection: Connection,
+    command: str,
+    check_exit_status: bool = True,
+    task_id: str = None,
+    on_line: Optional[Callable[[str], None]] = None,
+    stdin: Optional[bytes] = None,
+) -> int:
+    """Run a long SSH command, handling its output line by line as it arrives.
+
+    stdout and stderr are merged and never buffered in full; only the last few
+    lines are kept for the error message. If given, stdin is sent to the
+    command before its input is closed. Returns the exit status.
+    """
+    redis_client = get_redis_client()
+    logs_to_append = []
+    tail = deque(maxlen=ERROR_TAIL_LINES)
+
+    def flush_logs():
+        task_log_writer.append(task_id, logs_to_append)
+        logs_to_append.clear()
+
+    with _channel_slots(connection):
+        channel = connection.create_session()
+        try:
+            channel.set_combine_stderr(True)
+            channel.exec_command(command)
+            if stdin is not None:
+                channel.sendall(stdin)
+                channel.shutdown_write()
+            for raw_line in channel.makefile("rb"):
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+                tail.append(line)
+                if on_line:
+                    on_line(line)
+                if task_id:
+                    redis_client.xadd(
+                        f"task:{task_id}",
+                        {"stdout": line},
+                        maxlen=Config.LOG_STREAM_MAXLEN,
+                        approximate=True,
+                    )
+                    logs_to_append.append({"type": "stdout", "message": line})
+                    if len(logs_to_append) >= LOG_FLUSH_LINES:
+                        flush_logs()
+            exit_status = channel.recv_exit_status()
+        finally:
+            channel.close()
+            flush_logs()
+
+    if check_exit_status and exit_status != 0:
+        error_message = "\n".join(tail) or f"exit status {exit_status}"
+        raise ApplicationError(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            error_code="SSH_004",
+            payload={
+                "error": "SSH Command Failed",
+                "message": f"Command '{command}' failed with error: {error_message}",
+            },
+        )
+    return exit_status
+
+
 def connect_to_worker_node(
     control_ssh_client: Connection, worker_input: WorkerNodeInput
 ) -> Connection:
@@ -212,30 +324,38 @@ def connect_to_worker_node(
         f"Establishing SSH connection to worker node({worker_input.hostname}) through control node({control_ssh_client.host})"
     )
     try:
-        transport = control_ssh_client.transport
         dest_addr = (worker_input.hostname, worker_input.port)
         local_addr = LOCAL_ADDR
-        channel = transport.open_channel("direct-tcpip", dest_addr, local_addr)
 
         connection_params = _prepare_connection_params(worker_input)
-        connect_kwargs = {"timeout": SSH_TIMEOUT, "sock": channel}
+        connect_kwargs = {"timeout": SSH_TIMEOUT}
 
-        if "key_filename" in connection_params:
+        if "pkey" in connection_params:
+            connect_kwargs["pkey"] = connection_params["pkey"]
+        elif "key_filename" in connection_params:
             connect_kwargs["key_filename"] = connection_params["key_filename"]
             if "passphrase" in connection_params:
                 connect_kwargs["passphrase"] = connection_params["passphrase"]
         elif "password" in connection_params:
             connect_kwargs["password"] = connection_params["password"]
 
-        connection = Connection(
-            host=connection_params["hostname"],
-            user=connection_params["username"],
-            port=connection_params["port"],
-            connect_kwargs=connect_kwargs,
-        )
+        # The tunnel is set up under the control node's channel limit, so a
+        # large pool of workers does not open all of its tunnels at once
+        with _channel_slots(control_ssh_client):
+            transport = control_ssh_client.transport
+            channel = transport.open_channel("direct-tcpip", dest_addr, local_addr)
+            connect_kwargs["sock"] = channel
 
-        # Test the connection
-        connection.open()
+            connection = Connection(
+                host=connection_params["hostname"],
+                user=connection_params["username"],
+                port=connection_params["port"],
+                connect_kwargs=connect_kwargs,
+            )
+
+            # Test the connection
+            connection.open()
+        _tune_transport(connection)
         log.info(f"SSH connection established to worker node {worker_input.hostname}")
         return connection
     except AuthFailure as auth_ex:
@@ -248,3 +368,109 @@ def connect_to_worker_node(
             f"SSH connection error for worker node {worker_input.hostname}: {str(e)}"
         )
         raise SSHConnectionError(str(e))
+
+
+class SSHConnectionPool:
+    """Keep released SSH connections open so later calls can skip the handshake.
+
+    Connections are keyed by route (direct or through a control node), user,
+    host, port and a fingerprint of the credentials, so a connection is only
+    reused for an identical login. An acquired connection is exclusive to the
+    caller until it is released.
+    """
+
+    def __init__(
+        self, max_size: int = POOL_MAX_SIZE, idle_timeout: int = POOL_IDLE_TIMEOUT
+    ):
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._idle = OrderedDict()  # key -> (connection, released_at)
+        self._in_use = {}  # id(connection) -> key
+        self._lock = threading.Lock()
+
+    def acquire(
+        self,
+        machine_input: Union[ControlMachineInput, WorkerNodeInput],
+        control_ssh_client: Optional[Connection] = None,
+    ) -> Connection:
+        """Return a pooled connection, connecting through the control node if given."""
+        key = self._make_key(machine_input, control_ssh_client)
+        with self._lock:
+            to_close = self._pop_expired()
+            connection, _ = self._idle.pop(key, (None, None))
+        if connection is not None and not connection.is_connected:
+            to_close.append(connection)
+            connection = None
+        self._close_all(to_close)
+
+        if connection is None:
+            connection = (
+                connect_to_worker_node(control_ssh_client, machine_input)
+                if control_ssh_client
+                else get_ssh_client(machine_input)
+            )
+        else:
+            log.debug(f"Reusing pooled SSH connection to {machine_input.hostname}")
+
+        with self._lock:
+            self._in_use[id(connection)] = key
+        return connection
+
+    def release(self, connection: Connection) -> None:
+        """Return a connection to the pool, or close it if it cannot be reused."""
+        to_close = []
+        with self._lock:
+            key = self._in_use.pop(id(connection), None)
+            if key is None or key in self._idle or not connection.is_connected:
+                to_close.append(connection)
+            else:
+                self._idle[key] = (connection, time.monotonic())
+                while len(self._idle) > self._max_size:
+                    _, (oldest, _) = self._idle.popitem(last=False)
+                    to_close.append(oldest)
+        self._close_all(to_close)
+
+    def _pop_expired(self) -> list:
+        cutoff = time.monotonic() - self._idle_timeout
+        expired = [key for key, (_, used) in self._idle.items() if used < cutoff]
+        return [self._idle.pop(key)[0] for key in expired]
+
+    @staticmethod
+    def _close_all(connections: list) -> None:
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                log.debug(f"Error closing pooled SSH connection: {str(e)}")
+
+    @staticmethod
+    def _make_key(
+        machine_input: Union[ControlMachineInput, WorkerNodeInput],
+        control_ssh_client: Optional[Connection],
+    ) -> tuple:
+        pkey = getattr(machine_input, "pkey", None)
+        if pkey:
+            secret = pkey.asbytes()
+        elif machine_input.keyfile:
+            machine_input.keyfile.file.seek(0)
+            secret = machine_input.keyfile.file.read()
+            machine_input.keyfile.file.seek(0)
+            secret += (machine_input.passphrase or "").encode()
+        else:
+            secret = (machine_input.password or "").encode()
+
+        route = (
+            (control_ssh_client.user, control_ssh_client.host, control_ssh_client.port)
+            if control_ssh_client
+            else None
+        )
+        return (
+            route,
+            machine_input.username,
+            machine_input.hostname,
+            machine_input.port,
+            hashlib.sha256(secret).hexdigest(),
+        )
+
+
+ssh_pool = SSHConnectionPool()